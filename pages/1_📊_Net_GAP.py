@@ -73,15 +73,16 @@ def calculate_gap(
     """Load data and calculate GAP with expired inventory tracking"""
     
     with st.spinner("📊 Calculating GAP analysis..."):
-        # Load supply data
-        supply_df = data_loader.load_supply_data(
+        # Load supply and demand data in parallel
+        supply_df, demand_df = data_loader.load_supply_and_demand(
             entity_name=filter_values.get('entity'),
             exclude_entity=filter_values.get('exclude_entity', False),
             product_ids=filter_values.get('products_tuple'),
             brands=filter_values.get('brands_tuple'),
             exclude_products=filter_values.get('exclude_products', False),
             exclude_brands=filter_values.get('exclude_brands', False),
-            exclude_expired=filter_values.get('exclude_expired', True)
+            exclude_expired=filter_values.get('exclude_expired', True),
+            order_by=False  # the calculator aggregates per product
         )
         
         # Load expired inventory details if including expired
@@ -97,16 +98,6 @@ def calculate_gap(
             )
             logger.info(f"Loaded expired inventory for {len(expired_inventory_df)} products")
         
-        # Load demand data
-        demand_df = data_loader.load_demand_data(
-            entity_name=filter_values.get('entity'),
-            exclude_entity=filter_values.get('exclude_entity', False),
-            product_ids=filter_values.get('products_tuple'),
-            brands=filter_values.get('brands_tuple'),
-            exclude_products=filter_values.get('exclude_products', False),
-            exclude_brands=filter_values.get('exclude_brands', False)
-        )
-        
         # Load safety stock if needed
         safety_stock_df = None
         if filter_values.get('include_safety', False):
@@ -306,7 +297,7 @@ def main():
         search = st.text_input("Search", placeholder="Filter in all columns...", key="search")
         if search:
             mask = filtered_df.astype(str).apply(
-                lambda x: x.str.contains(search, case=False, na=False)
+                lambda x: x.str.contains(search, case=False, na=False, regex=False)
             ).any(axis=1)
             filtered_df = filtered_df[mask]
     
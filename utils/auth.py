@@ -148,8 +148,10 @@ class AuthManager:
             if key in st.session_state:
                 del st.session_state[key]
         
-        # Clear cache
+        # Clear cache, including the process-wide Net GAP loader caches
         st.cache_data.clear()
+        from .net_gap.data_loader import reset_caches
+        reset_caches()
         
         logger.info(f"User {username} logged out")
     
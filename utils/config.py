@@ -160,6 +160,8 @@ class Config:
             "CACHE_TTL_SECONDS": int(os.getenv("CACHE_TTL_SECONDS", "300")),  # 5 minutes
             "DB_POOL_SIZE": int(os.getenv("DB_POOL_SIZE", "5")),
             "DB_POOL_RECYCLE": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+            "DB_POOL_MAX_OVERFLOW": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+            "DB_POOL_TIMEOUT": int(os.getenv("DB_POOL_TIMEOUT", "30")),
             
             # Localization
             "TIMEZONE": os.getenv("TIMEZONE", "Asia/Ho_Chi_Minh"),
@@ -55,19 +55,24 @@ def get_db_engine():
                 # Get pool settings from APP_CONFIG
                 pool_size = APP_CONFIG.get("DB_POOL_SIZE", 5)
                 pool_recycle = APP_CONFIG.get("DB_POOL_RECYCLE", 3600)
+                max_overflow = APP_CONFIG.get("DB_POOL_MAX_OVERFLOW", 10)
+                pool_timeout = APP_CONFIG.get("DB_POOL_TIMEOUT", 30)
                 
                 _engine = create_engine(
                     url,
                     poolclass=QueuePool,
                     pool_size=pool_size,        # Number of connections to keep open
-                    max_overflow=10,            # Additional connections when pool is full
-                    pool_timeout=30,            # Seconds to wait for available connection
+                    max_overflow=max_overflow,  # Additional connections when pool is full
+                    pool_timeout=pool_timeout,  # Seconds to wait for available connection
                     pool_recycle=pool_recycle,  # Recycle connections after N seconds
                     pool_pre_ping=True,         # Test connection before using (auto-reconnect)
                     echo=False                  # Set to True for SQL debugging
                 )
                 
-                logger.info(f"✅ Database engine created (pool_size={pool_size}, recycle={pool_recycle}s)")
+                logger.info(
+                    f"✅ Database engine created (pool_size={pool_size}, max_overflow={max_overflow}, "
+                    f"timeout={pool_timeout}s, recycle={pool_recycle}s)"
+                )
     
     return _engine
 
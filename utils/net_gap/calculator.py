@@ -18,7 +18,8 @@ from datetime import datetime
 import logging
 
 from .calculation_result import GAPCalculationResult, CustomerImpact
-from .constants import THRESHOLDS, GAP_CATEGORIES, STATUS_CONFIG
+from .constants import THRESHOLDS, GAP_CATEGORIES, STATUS_CONFIG, URGENCY_LEVELS
+from .formatters import STRING_DTYPE
 
 logger = logging.getLogger(__name__)
 
@@ -750,58 +751,70 @@ class GAPCalculator:
         """Calculate customer impact for shortage items"""
         
         try:
-            shortage_df = gap_df[gap_df['net_gap'] < 0]
-            
-            if shortage_df.empty or demand_df.empty:
+            if demand_df.empty:
                 return None
             
-            shortage_products = shortage_df['product_id'].tolist()
-            affected_demand = demand_df[demand_df['product_id'].isin(shortage_products)].copy()
-            
-            if affected_demand.empty:
+            shortage_mask = gap_df['net_gap'].to_numpy() < 0
+            if not shortage_mask.any():
                 return None
             
-            shortage_lookup = shortage_df.set_index('product_id')[
-                ['net_gap', 'total_demand', 'at_risk_value_usd', 'coverage_ratio']
-            ].to_dict('index')
-            
-            affected_demand['product_shortage'] = affected_demand.apply(
-                lambda row: abs(shortage_lookup.get(row['product_id'], {}).get('net_gap', 0)) *
-                (row['required_quantity'] / shortage_lookup.get(row['product_id'], {}).get('total_demand', 1))
-                if row['product_id'] in shortage_lookup and shortage_lookup[row['product_id']]['total_demand'] > 0
-                else 0,
-                axis=1
-            )
+            shortage_df = gap_df.loc[
+                shortage_mask,
+                ['product_id', 'net_gap', 'total_demand', 'at_risk_value_usd']
+            ]
+            
+            shortage_products = shortage_df['product_id'].unique()
+            keep_cols = [
+                'product_id', 'required_quantity', 'customer',
+                'customer_code', 'total_value_usd', 'urgency_level'
+            ]
+            affected_demand = demand_df.loc[
+                demand_df['product_id'].isin(shortage_products), keep_cols
+            ].copy()
+            
+            if affected_demand.empty or affected_demand['customer'].isna().all():
+                return None
             
-            affected_demand['product_risk'] = affected_demand.apply(
-                lambda row: shortage_lookup.get(row['product_id'], {}).get('at_risk_value_usd', 0) *
-                (row['required_quantity'] / shortage_lookup.get(row['product_id'], {}).get('total_demand', 1))
-                if row['product_id'] in shortage_lookup and shortage_lookup[row['product_id']]['total_demand'] > 0
-                else 0,
-                axis=1
+            # Vectorized per-row allocation of product shortage/risk by demand share.
+            # Series.map keeps affected_demand's row order and index intact.
+            shortage_by_product = shortage_df.set_index('product_id')
+            pid = affected_demand['product_id']
+            td = pid.map(shortage_by_product['total_demand']).to_numpy(dtype='float64')
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = affected_demand['required_quantity'].to_numpy(dtype='float64') / td
+            ratio = np.where((td > 0) & np.isfinite(ratio), ratio, 0.0)
+            
+            affected_demand['product_shortage'] = np.abs(
+                pid.map(shortage_by_product['net_gap']).to_numpy(dtype='float64')
+            ) * ratio
+            affected_demand['product_risk'] = pid.map(
+                shortage_by_product['at_risk_value_usd']
+            ).to_numpy(dtype='float64') * ratio
+            
+            # Ordered categorical so 'min' picks the most urgent level per customer
+            affected_demand['urgency_level'] = pd.Categorical(
+                affected_demand['urgency_level'], categories=URGENCY_LEVELS, ordered=True
             )
             
-            customer_agg = affected_demand.groupby('customer').agg({
-                'required_quantity': 'sum',
-                'product_id': 'nunique',
-                'total_value_usd': 'sum',
-                'product_shortage': 'sum',
-                'product_risk': 'sum',
-                'urgency_level': 'min',
-                'customer_code': 'first'
-            }).reset_index()
-            
-            customer_agg.rename(columns={
-                'required_quantity': 'total_required',
-                'product_id': 'product_count',
-                'total_value_usd': 'total_demand_value',
-                'product_shortage': 'total_shortage',
-                'product_risk': 'at_risk_value',
-                'urgency_level': 'urgency'
-            }, inplace=True)
+            agg_cols = [
+                'customer', 'customer_code', 'required_quantity', 'product_id',
+                'total_value_usd', 'product_shortage', 'product_risk', 'urgency_level'
+            ]
+            customer_agg = affected_demand[agg_cols].groupby(
+                'customer', sort=False, observed=True
+            ).agg(
+                total_required=('required_quantity', 'sum'),
+                product_count=('product_id', 'nunique'),
+                total_demand_value=('total_value_usd', 'sum'),
+                total_shortage=('product_shortage', 'sum'),
+                at_risk_value=('product_risk', 'sum'),
+                urgency=('urgency_level', 'min'),
+                customer_code=('customer_code', 'first')
+            ).reset_index()
             
             customer_df = customer_agg.sort_values('at_risk_value', ascending=False)
-            customer_df['products'] = [[] for _ in range(len(customer_df))]
+            # Codes are searched as text in the customer dialog; convert once here
+            customer_df['customer_code'] = customer_df['customer_code'].astype(STRING_DTYPE)
             
             return CustomerImpact(
                 customer_df=customer_df,
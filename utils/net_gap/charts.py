@@ -6,14 +6,60 @@ Chart heights reduced for better screen utilization
 """
 
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from typing import Optional
 import logging
 
-from .constants import GAP_CATEGORIES, UI_CONFIG
+from .constants import GAP_CATEGORIES, STATUS_TO_CATEGORY, UI_CONFIG
 
 logger = logging.getLogger(__name__)
 
+# Static layout pieces shared across renders (reduced margins for compact display)
+_DONUT_MARGIN = dict(t=30, b=30, l=30, r=30)
+_BAR_MARGIN = dict(l=180, r=80, t=40, b=40)
+_VALUE_MARGIN = dict(l=180, r=100, t=40, b=40)
+
+_EMPTY_LAYOUT = dict(
+    height=UI_CONFIG['chart_height_compact'],
+    xaxis=dict(visible=False),
+    yaxis=dict(visible=False),
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)'
+)
+
+_DONUT_HOVER = '<b>%{label}</b><br>Count: %{value}<br>%{percent}<extra></extra>'
+_BAR_HOVER = '<b>%{y}</b><br>Quantity: %{x:,.0f}<extra></extra>'
+_VALUE_HOVER = '<b>%{y}</b><br>At Risk: $%{x:,.0f}<extra></extra>'
+
+
+def _top_k(df: pd.DataFrame, col: str, k: int) -> pd.DataFrame:
+    """Return the k rows with the largest `col`, sorted descending.
+    
+    Uses np.argpartition (O(n)) so only the k selected rows get sorted.
+    """
+    k = min(k, len(df))
+    if k <= 0:
+        return df.iloc[:0]
+    
+    vals = df[col].to_numpy(dtype='float64')
+    if k < len(vals):
+        idx = np.sort(np.argpartition(-vals, k - 1)[:k])
+    else:
+        idx = np.arange(len(vals))
+    
+    return df.iloc[idx].sort_values(col, ascending=False, kind='stable')
+
+
+def _product_labels(df: pd.DataFrame, name_len: int) -> pd.Series:
+    """Build 'PT code - product name' labels with vectorized string ops"""
+    if 'pt_code' in df.columns:
+        pt = df['pt_code'].fillna('').astype(str)
+    else:
+        pt = pd.Series('', index=df.index)
+    name = df['product_name'].fillna('').astype(str).str.slice(0, name_len)
+    return pt.str.cat(name, sep=' - ')
+
 
 class GAPCharts:
     """Essential visualizations with optimized dimensions"""
@@ -27,12 +73,16 @@ class GAPCharts:
         if gap_df.empty:
             return self._empty_chart("No data available")
         
-        # Count by simplified categories
+        # Count by simplified categories (single value_counts pass)
+        status_counts = gap_df['gap_status'].value_counts(sort=False)
+        category_counts = status_counts.groupby(
+            status_counts.index.map(STATUS_TO_CATEGORY), sort=False
+        ).sum()
+        
         categories_data = []
         
         for category, config in GAP_CATEGORIES.items():
-            mask = gap_df['gap_status'].isin(config['statuses'])
-            count = len(gap_df[mask])
+            count = int(category_counts.get(category, 0))
             
             if count > 0:
                 categories_data.append({
@@ -46,22 +96,24 @@ class GAPCharts:
             return self._empty_chart("No items to display")
         
         # Create donut chart
-        df = pd.DataFrame(categories_data)
+        values = [d['count'] for d in categories_data]
+        labels = [d['category'] for d in categories_data]
+        colors = [d['color'] for d in categories_data]
         
         fig = go.Figure(data=[go.Pie(
-            values=df['count'],
-            labels=df['category'],
+            values=values,
+            labels=labels,
             hole=0.6,
-            marker=dict(colors=df['color']),
+            marker=dict(colors=colors),
             textinfo='label+percent',
             textposition='outside',
-            hovertemplate='<b>%{label}</b><br>Count: %{value}<br>%{percent}<extra></extra>'
+            hovertemplate=_DONUT_HOVER
         )])
         
         # Add center annotation with key metric
         shortage_count = sum(d['count'] for d in categories_data 
                            if d['category'] == 'Shortage')
-        total_count = sum(d['count'] for d in categories_data)
+        total_count = sum(values)
         
         fig.add_annotation(
             text=f"<b>{shortage_count}</b><br>Shortage Items",
@@ -74,7 +126,7 @@ class GAPCharts:
             title="GAP Distribution",
             height=UI_CONFIG['chart_height_compact'],  # Reduced from 400px to 300px
             showlegend=True,
-            margin=dict(t=30, b=30, l=30, r=30)  # Reduced margins
+            margin=_DONUT_MARGIN
         )
         
         return fig
@@ -90,15 +142,19 @@ class GAPCharts:
         if gap_df.empty:
             return self._empty_chart("No data available")
         
+        # Only carry the columns the chart consumes through filter/top-N
+        needed = [c for c in ('net_gap', 'pt_code', 'product_name') if c in gap_df.columns]
+        net_gap = gap_df['net_gap'].to_numpy()
+        
         # Filter based on type
         if chart_type == 'shortage':
-            df = gap_df[gap_df['net_gap'] < 0].copy()
-            df['value'] = df['net_gap'].abs()
+            df = gap_df.loc[net_gap < 0, needed]
+            df = df.assign(value=np.abs(df['net_gap'].to_numpy()))
             title = f"Top {min(top_n, len(df))} Shortage Items"
             color = GAP_CATEGORIES['SHORTAGE']['color']
         else:  # surplus
-            df = gap_df[gap_df['net_gap'] > 0].copy()
-            df['value'] = df['net_gap']
+            df = gap_df.loc[net_gap > 0, needed]
+            df = df.assign(value=df['net_gap'].to_numpy())
             title = f"Top {min(top_n, len(df))} Surplus Items"
             color = GAP_CATEGORIES['SURPLUS']['color']
         
@@ -106,27 +162,24 @@ class GAPCharts:
             return self._empty_chart(f"No {chart_type} items found")
         
         # Get top N
-        df = df.nlargest(min(top_n, len(df)), 'value')
+        df = _top_k(df, 'value', top_n)
         
         # Prepare display names (shorter for compact display)
         if 'product_name' in df.columns:
-            df['display'] = df.apply(
-                lambda x: f"{x.get('pt_code', '')} - {x.get('product_name', '')[:25]}",
-                axis=1
-            )
+            df['display'] = _product_labels(df, 25)
         else:
             df['display'] = df.index.astype(str)
         
         # Create bar chart
         fig = go.Figure(data=[
             go.Bar(
-                x=df['value'],
+                x=df['value'].to_numpy(dtype=np.float64),
                 y=df['display'],
                 orientation='h',
                 marker=dict(color=color),
                 text=df['value'].apply(lambda x: f"{x:,.0f}"),
                 textposition='outside',
-                hovertemplate='<b>%{y}</b><br>Quantity: %{x:,.0f}<extra></extra>'
+                hovertemplate=_BAR_HOVER
             )
         ])
         
@@ -138,7 +191,7 @@ class GAPCharts:
             xaxis_title=f"{chart_type.title()} Quantity",
             yaxis=dict(autorange="reversed"),
             height=dynamic_height,
-            margin=dict(l=180, r=80, t=40, b=40)  # Reduced margins
+            margin=_BAR_MARGIN
         )
         
         return fig
@@ -156,25 +209,26 @@ class GAPCharts:
             return self._empty_chart("No items with value at risk")
         
         # Get top 15 items
-        risk_df = risk_df.nlargest(min(15, len(risk_df)), 'at_risk_value_usd')
+        risk_df = _top_k(risk_df, 'at_risk_value_usd', 15)
         
         # Prepare display (more compact)
         if 'product_name' in risk_df.columns:
-            risk_df['display'] = risk_df.apply(
-                lambda x: f"{x.get('pt_code', '')} - {x.get('product_name', '')[:20]}",
-                axis=1
-            )
+            risk_df['display'] = _product_labels(risk_df, 20)
         else:
             risk_df['display'] = risk_df.index.astype(str)
         
+        # Bar lengths and hover keep full precision; only the colour scale,
+        # which needs no more than display precision, is sent as float32
+        xvals = risk_df['at_risk_value_usd'].to_numpy(dtype=np.float64)
+        
         # Create bar chart
         fig = go.Figure(data=[
             go.Bar(
-                x=risk_df['at_risk_value_usd'],
+                x=xvals,
                 y=risk_df['display'],
                 orientation='h',
                 marker=dict(
-                    color=risk_df['at_risk_value_usd'],
+                    color=xvals.astype(np.float32),
                     colorscale='Reds',
                     showscale=True,
                     colorbar=dict(
@@ -185,7 +239,7 @@ class GAPCharts:
                 ),
                 text=risk_df['at_risk_value_usd'].apply(lambda x: f"${x:,.0f}"),
                 textposition='outside',
-                hovertemplate='<b>%{y}</b><br>At Risk: $%{x:,.0f}<extra></extra>'
+                hovertemplate=_VALUE_HOVER
             )
         ])
         
@@ -197,14 +251,14 @@ class GAPCharts:
             xaxis_title="Value at Risk (USD)",
             yaxis=dict(autorange="reversed"),
             height=dynamic_height,
-            margin=dict(l=180, r=100, t=40, b=40)
+            margin=_VALUE_MARGIN
         )
         
         return fig
     
     def _empty_chart(self, message: str) -> go.Figure:
         """Create empty chart with message"""
-        fig = go.Figure()
+        fig = go.Figure(layout=_EMPTY_LAYOUT)
         
         fig.add_annotation(
             text=message,
@@ -214,12 +268,4 @@ class GAPCharts:
             font=dict(size=14, color="gray")
         )
         
-        fig.update_layout(
-            height=UI_CONFIG['chart_height_compact'],
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
-        return fig
\ No newline at end of file
+        return fig
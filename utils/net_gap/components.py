@@ -14,8 +14,11 @@ import numpy as np
 from typing import Dict, Any, Optional, List
 import logging
 
-from .constants import STATUS_ICONS, FIELD_TOOLTIPS, UI_CONFIG, STATUS_CONFIG, GAP_CATEGORIES
-from .formatters import GAPFormatter
+from .constants import (
+    STATUS_ICONS, FIELD_TOOLTIPS, UI_CONFIG, STATUS_CONFIG, GAP_CATEGORIES,
+    STATUS_TO_CATEGORY, GAP_CATEGORY_STATUS_SETS
+)
+from .formatters import GAPFormatter, STRING_DTYPE
 
 logger = logging.getLogger(__name__)
 
@@ -46,9 +49,120 @@ STATUS_ICONS_V45 = {
 }
 
 
+# =============================================================================
+# TABLE / FILTER LOOKUPS - built once at import
+# =============================================================================
+_PRIORITY_MAP = {1: 'P1-Critical', 2: 'P2-High', 3: 'P3-Medium', 4: 'P4-Low', 99: 'P99-OK'}
+
+_FILTER_OPTIONS = {
+    'all': '📊 All Items',
+    'shortage': '🔴 Shortage Only',
+    'optimal': '✅ Balanced Only',
+    'surplus': '📦 Surplus Only',
+    'inactive': '⚪ No Demand',
+    'critical': '🚨 Critical Only'
+}
+
+_CATEGORY_MAP = {
+    'shortage': 'SHORTAGE',
+    'optimal': 'OPTIMAL',
+    'surplus': 'SURPLUS',
+    'inactive': 'INACTIVE'
+}
+
+_COLUMN_HELP_TEXTS = {
+    'Coverage %': 'Available Supply as percentage of Demand',
+    'Available': 'Supply after safety reservation = max(0, Supply - Safety)',
+    'Safety Stock': 'Minimum buffer required',
+    'At Risk Value': 'Revenue at risk due to shortage'
+}
+
+_DEFAULT_VISIBLE_COLUMNS = (
+    'PT Code', 'Product Name', 'Brand',
+    'Total Supply', 'Total Demand', 
+    'Net GAP', 'Coverage %',
+    'Status', 'Priority'
+)
+
+_SAFETY_VISIBLE_COLUMNS = ('Safety Stock', 'Safety Gap', 'Available', 'True GAP', 'Shortage Cause')
+
+
 # =============================================================================
 # FORMULA GUIDE - Complete version
 # =============================================================================
+# Static guide tables, built once at import rather than on every rerun
+_STATUS_LOGIC_DF = pd.DataFrame([
+    {'Net GAP': '< 0', 'Group': '🔴 SHORTAGE (always!)'},
+    {'Net GAP': '= 0', 'Group': '✅ BALANCED'},
+    {'Net GAP': '> 0', 'Group': '📦 SURPLUS (always!)'}
+])
+
+_CAUSES_DF = pd.DataFrame([
+    {'Icon': '✅', 'Cause': 'OK - No shortage'},
+    {'Icon': '🔒', 'Cause': 'Safety stock requirement'},
+    {'Icon': '🚨', 'Cause': 'Real shortage'}
+])
+
+_EXAMPLE_DF = pd.DataFrame([
+    {
+        'Scenario': '✅ Healthy',
+        'Supply': 100,
+        'Safety': 20,
+        'Demand': 50,
+        'Safety Gap': '+80',
+        'Available': 80,
+        'Net GAP': '+30',
+        'True GAP': '+50',
+        'Cause': '✅ OK'
+    },
+    {
+        'Scenario': '⚠️ Tight',
+        'Supply': 100,
+        'Safety': 20,
+        'Demand': 90,
+        'Safety Gap': '+80',
+        'Available': 80,
+        'Net GAP': '-10',
+        'True GAP': '+10',
+        'Cause': '🔒 Safety Requirement'
+    },
+    {
+        'Scenario': '🔴 Real Shortage',
+        'Supply': 50,
+        'Safety': 20,
+        'Demand': 80,
+        'Safety Gap': '+30',
+        'Available': 30,
+        'Net GAP': '-50',
+        'True GAP': '-30',
+        'Cause': '🚨 Real Shortage'
+    },
+    {
+        'Scenario': '⚠️ Under Safety',
+        'Supply': 3,
+        'Safety': 25,
+        'Demand': 3,
+        'Safety Gap': '-22',
+        'Available': 0,
+        'Net GAP': '-3',
+        'True GAP': '0',
+        'Cause': '🔒 Supply < Safety Req.'
+    }
+])
+
+_EXAMPLE_COLUMN_CONFIG = {
+    'Scenario': st.column_config.TextColumn('Scenario', width='medium'),
+    'Supply': st.column_config.NumberColumn('Supply', format='%d'),
+    'Safety': st.column_config.NumberColumn('Safety', format='%d'),
+    'Demand': st.column_config.NumberColumn('Demand', format='%d'),
+    'Safety Gap': st.column_config.TextColumn('Safety Gap', width='small'),
+    'Available': st.column_config.NumberColumn('Available', format='%d'),
+    'Net GAP': st.column_config.TextColumn('Net GAP', width='small'),
+    'True GAP': st.column_config.TextColumn('True GAP', width='small'),
+    'Cause': st.column_config.TextColumn('Cause', width='medium')
+}
+
+
 def render_formula_guide():
     """Render expandable formula explanation guide - Complete version"""
     
@@ -87,12 +201,7 @@ def render_formula_guide():
             **Primary rule: Net GAP sign determines group**
             """)
             
-            status_logic = pd.DataFrame([
-                {'Net GAP': '< 0', 'Group': '🔴 SHORTAGE (always!)'},
-                {'Net GAP': '= 0', 'Group': '✅ BALANCED'},
-                {'Net GAP': '> 0', 'Group': '📦 SURPLUS (always!)'}
-            ])
-            st.dataframe(status_logic, use_container_width=True, hide_index=True)
+            st.dataframe(_STATUS_LOGIC_DF, use_container_width=True, hide_index=True)
             
             st.markdown("""
             **Secondary: Coverage determines severity**
@@ -129,12 +238,7 @@ def render_formula_guide():
         with col2:
             st.markdown("### Shortage Causes")
             
-            causes_data = pd.DataFrame([
-                {'Icon': '✅', 'Cause': 'OK - No shortage'},
-                {'Icon': '🔒', 'Cause': 'Safety stock requirement'},
-                {'Icon': '🚨', 'Cause': 'Real shortage'}
-            ])
-            st.dataframe(causes_data, use_container_width=True, hide_index=True)
+            st.dataframe(_CAUSES_DF, use_container_width=True, hide_index=True)
             
             st.markdown("""
             **How to interpret:**
@@ -150,68 +254,11 @@ def render_formula_guide():
         # ===== ROW 3: Example Scenarios =====
         st.markdown("### Example Scenarios")
         
-        example_data = pd.DataFrame([
-            {
-                'Scenario': '✅ Healthy',
-                'Supply': 100,
-                'Safety': 20,
-                'Demand': 50,
-                'Safety Gap': '+80',
-                'Available': 80,
-                'Net GAP': '+30',
-                'True GAP': '+50',
-                'Cause': '✅ OK'
-            },
-            {
-                'Scenario': '⚠️ Tight',
-                'Supply': 100,
-                'Safety': 20,
-                'Demand': 90,
-                'Safety Gap': '+80',
-                'Available': 80,
-                'Net GAP': '-10',
-                'True GAP': '+10',
-                'Cause': '🔒 Safety Requirement'
-            },
-            {
-                'Scenario': '🔴 Real Shortage',
-                'Supply': 50,
-                'Safety': 20,
-                'Demand': 80,
-                'Safety Gap': '+30',
-                'Available': 30,
-                'Net GAP': '-50',
-                'True GAP': '-30',
-                'Cause': '🚨 Real Shortage'
-            },
-            {
-                'Scenario': '⚠️ Under Safety',
-                'Supply': 3,
-                'Safety': 25,
-                'Demand': 3,
-                'Safety Gap': '-22',
-                'Available': 0,
-                'Net GAP': '-3',
-                'True GAP': '0',
-                'Cause': '🔒 Supply < Safety Req.'
-            }
-        ])
-        
         st.dataframe(
-            example_data,
+            _EXAMPLE_DF,
             use_container_width=True,
             hide_index=True,
-            column_config={
-                'Scenario': st.column_config.TextColumn('Scenario', width='medium'),
-                'Supply': st.column_config.NumberColumn('Supply', format='%d'),
-                'Safety': st.column_config.NumberColumn('Safety', format='%d'),
-                'Demand': st.column_config.NumberColumn('Demand', format='%d'),
-                'Safety Gap': st.column_config.TextColumn('Safety Gap', width='small'),
-                'Available': st.column_config.NumberColumn('Available', format='%d'),
-                'Net GAP': st.column_config.TextColumn('Net GAP', width='small'),
-                'True GAP': st.column_config.TextColumn('True GAP', width='small'),
-                'Cause': st.column_config.TextColumn('Cause', width='medium')
-            }
+            column_config=_EXAMPLE_COLUMN_CONFIG
         )
         
         st.info("""
@@ -227,21 +274,26 @@ def render_formula_guide():
 def render_kpi_cards(metrics: Dict[str, Any], include_safety: bool = False):
     """Render KPI metric cards"""
     
+    total_products = metrics['total_products']
+    shortage_items = metrics['shortage_items']
+    critical = metrics['critical_items']
+    coverage = metrics['overall_coverage']
+    shortage_pct = shortage_items * 100.0 / max(total_products, 1)
+    
     # Row 1: Core metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             "📦 Total Products",
-            f"{metrics['total_products']:,}",
+            f"{total_products:,}",
             help="Total number of products analyzed"
         )
     
     with col2:
-        shortage_pct = (metrics['shortage_items'] / max(metrics['total_products'], 1)) * 100
         st.metric(
             "⚠️ Shortage Items",
-            f"{metrics['shortage_items']:,}",
+            f"{shortage_items:,}",
             f"{shortage_pct:.1f}% of total",
             delta_color="inverse"
         )
@@ -249,13 +301,12 @@ def render_kpi_cards(metrics: Dict[str, Any], include_safety: bool = False):
     with col3:
         st.metric(
             "🚨 Critical Items",
-            f"{metrics['critical_items']:,}",
-            "Immediate action" if metrics['critical_items'] > 0 else "All good",
-            delta_color="inverse" if metrics['critical_items'] > 0 else "normal"
+            f"{critical:,}",
+            "Immediate action" if critical > 0 else "All good",
+            delta_color="inverse" if critical > 0 else "normal"
         )
     
     with col4:
-        coverage = metrics['overall_coverage']
         st.metric(
             "📊 Coverage Rate",
             f"{coverage:.1f}%",
@@ -296,33 +347,36 @@ def render_kpi_cards(metrics: Dict[str, Any], include_safety: bool = False):
     
     # Row 3: Safety metrics (if applicable)
     if include_safety and 'below_safety_count' in metrics:
+        below_safety = metrics.get('below_safety_count', 0)
+        at_reorder = metrics.get('at_reorder_count', 0)
+        safety_value = metrics.get('safety_stock_value', 0)
+        expired_count = metrics.get('has_expired_count', 0)
+        expiry_risk = metrics.get('expiry_risk_count', 0)
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric(
                 "🔒 Below Safety",
-                f"{metrics.get('below_safety_count', 0):,}",
+                f"{below_safety:,}",
                 help="Items below safety stock level"
             )
         
         with col2:
             st.metric(
                 "📦 At Reorder",
-                f"{metrics.get('at_reorder_count', 0):,}",
+                f"{at_reorder:,}",
                 help="Items at or below reorder point"
             )
         
         with col3:
             st.metric(
                 "💵 Safety Value",
-                f"${metrics.get('safety_stock_value', 0):,.0f}",
+                f"${safety_value:,.0f}",
                 help="Total value of safety stock"
             )
         
         with col4:
-            expired_count = metrics.get('has_expired_count', 0)
-            expiry_risk = metrics.get('expiry_risk_count', 0)
-            
             if expired_count > 0:
                 st.metric(
                     "⌛ Expired",
@@ -341,26 +395,83 @@ def render_kpi_cards(metrics: Dict[str, Any], include_safety: bool = False):
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
+_SAFETY_GAP_NEGATIVE = "🔴 "
+_SAFETY_GAP_ZERO = "🟡 0"
+_SAFETY_GAP_POSITIVE = "🟢 "
+
+
 def _format_safety_gap(value: float, formatter: GAPFormatter) -> str:
     """Format safety gap with visual indicator"""
     if pd.isna(value):
         return "N/A"
     
     if value < 0:
-        return f"🔴 {formatter.format_number(value, show_sign=True)}"
+        return _SAFETY_GAP_NEGATIVE + formatter.format_number(value, show_sign=True)
     elif value == 0:
-        return f"🟡 0"
+        return _SAFETY_GAP_ZERO
     else:
-        return f"🟢 {formatter.format_number(value, show_sign=True)}"
+        return _SAFETY_GAP_POSITIVE + formatter.format_number(value, show_sign=True)
 
 
-def _get_status_display(status: str) -> str:
-    """Get formatted status display with icon"""
+def _float_array(values: pd.Series) -> np.ndarray:
+    """Numeric column as a float64 ndarray (non-numeric becomes NaN)"""
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _map_low_cardinality(values: pd.Series, mapper, missing: str) -> np.ndarray:
+    """
+    Map a low-cardinality column through `mapper` once per distinct value
+    Rows are factorized to integer codes and the labels gathered by code
+    """
+    codes, uniques = pd.factorize(values)
+    labels = np.array([mapper(u) for u in uniques] + [missing], dtype=object)
+    return labels[codes]  # code -1 (missing) picks the trailing entry
+
+
+def _map_low_cardinality_categorical(values, mapper, missing: str) -> pd.Categorical:
+    """
+    Same mapping as _map_low_cardinality, returned as a Categorical
+    Rows keep integer codes into the distinct labels, so no per-row strings are built
+    """
+    codes, uniques = pd.factorize(values)
+    labels = np.array([mapper(u) for u in uniques] + [missing], dtype=object)
+    # Different codes may render to the same label; collapse them to one category
+    categories, label_codes = np.unique(labels.astype(str), return_inverse=True)
+    return pd.Categorical.from_codes(label_codes[codes], categories=categories)
+
+
+def _format_safety_gap_series(values: pd.Series, formatter: GAPFormatter) -> pd.Series:
+    """Vectorized _format_safety_gap for a whole column"""
+    arr = _float_array(values)
+    numbers = formatter.format_number_series(values, show_sign=True).to_numpy()
+    
+    result = np.select(
+        [np.isnan(arr), arr < 0, arr == 0],
+        ["N/A", _SAFETY_GAP_NEGATIVE + numbers, _SAFETY_GAP_ZERO],
+        default=_SAFETY_GAP_POSITIVE + numbers
+    )
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def _build_status_display(status: str) -> str:
+    """Build status display string with icon"""
     icon = STATUS_ICONS_V45.get(status, '❓')
     label = status.replace('_', ' ').title()
     return f"{icon} {label}"
 
 
+# Precomputed display strings for every known status
+_STATUS_DISPLAY = {status: _build_status_display(status) for status in STATUS_ICONS_V45}
+
+
+def _get_status_display(status: str) -> str:
+    """Get formatted status display with icon"""
+    display = _STATUS_DISPLAY.get(status)
+    if display is None:
+        display = _build_status_display(status)
+    return display
+
+
 # =============================================================================
 # DETAILED DISPLAY - v4.5
 # =============================================================================
@@ -375,165 +486,195 @@ def prepare_detailed_display(
     if df.empty:
         return df
     
-    display_df = pd.DataFrame()
+    cols_present = frozenset(df.columns)
+    
+    # Collect columns first and build the frame once at the end
+    cols: Dict[str, Any] = {}
     
-    # Product identification
-    if 'pt_code' in df.columns:
-        display_df['PT Code'] = df['pt_code']
-    if 'product_name' in df.columns:
-        display_df['Product Name'] = df['product_name']
-    if 'brand' in df.columns:
-        display_df['Brand'] = df['brand']
-    if 'standard_uom' in df.columns:
-        display_df['UOM'] = df['standard_uom']
+    # Product identification (pass-through columns share the source arrays)
+    if 'pt_code' in cols_present:
+        cols['PT Code'] = df['pt_code'].values
+    if 'product_name' in cols_present:
+        cols['Product Name'] = df['product_name'].values
+    if 'brand' in cols_present:
+        cols['Brand'] = df['brand'].values
+    if 'standard_uom' in cols_present:
+        cols['UOM'] = df['standard_uom'].values
     
     # Supply columns
-    if 'total_supply' in df.columns:
-        display_df['Total Supply'] = df['total_supply'].apply(
-            lambda x: formatter.format_number(x, field_name='total_supply')
+    if 'total_supply' in cols_present:
+        cols['Total Supply'] = formatter.format_number_series(
+            df['total_supply'], field_name='total_supply'
         )
     
     # Supply breakdown
-    if 'supply_inventory' in df.columns:
-        display_df['Inventory'] = df['supply_inventory'].apply(
-            lambda x: formatter.format_number(x, field_name='supply_inventory')
+    if 'supply_inventory' in cols_present:
+        cols['Inventory'] = formatter.format_number_series(
+            df['supply_inventory'], field_name='supply_inventory'
         )
-    if 'supply_can_pending' in df.columns:
-        display_df['CAN Pending'] = df['supply_can_pending'].apply(
-            lambda x: formatter.format_number(x, field_name='supply_can_pending')
+    if 'supply_can_pending' in cols_present:
+        cols['CAN Pending'] = formatter.format_number_series(
+            df['supply_can_pending'], field_name='supply_can_pending'
         )
-    if 'supply_warehouse_transfer' in df.columns:
-        display_df['Transfer'] = df['supply_warehouse_transfer'].apply(
-            lambda x: formatter.format_number(x, field_name='supply_warehouse_transfer')
+    if 'supply_warehouse_transfer' in cols_present:
+        cols['Transfer'] = formatter.format_number_series(
+            df['supply_warehouse_transfer'], field_name='supply_warehouse_transfer'
         )
-    if 'supply_purchase_order' in df.columns:
-        display_df['PO'] = df['supply_purchase_order'].apply(
-            lambda x: formatter.format_number(x, field_name='supply_purchase_order')
+    if 'supply_purchase_order' in cols_present:
+        cols['PO'] = formatter.format_number_series(
+            df['supply_purchase_order'], field_name='supply_purchase_order'
         )
     
     # Demand columns
-    if 'total_demand' in df.columns:
-        display_df['Total Demand'] = df['total_demand'].apply(formatter.format_number)
+    if 'total_demand' in cols_present:
+        cols['Total Demand'] = formatter.format_number_series(df['total_demand'])
     
-    if 'demand_oc_pending' in df.columns:
-        display_df['OC Pending'] = df['demand_oc_pending'].apply(formatter.format_number)
-    if 'demand_forecast' in df.columns:
-        display_df['Forecast'] = df['demand_forecast'].apply(formatter.format_number)
+    if 'demand_oc_pending' in cols_present:
+        cols['OC Pending'] = formatter.format_number_series(df['demand_oc_pending'])
+    if 'demand_forecast' in cols_present:
+        cols['Forecast'] = formatter.format_number_series(df['demand_forecast'])
     
     # Safety Stock columns (when enabled)
     if include_safety:
-        if 'safety_stock_qty' in df.columns:
-            display_df['Safety Stock'] = df['safety_stock_qty'].apply(
-                lambda x: formatter.format_number(x, field_name='safety_stock_qty')
+        if 'safety_stock_qty' in cols_present:
+            cols['Safety Stock'] = formatter.format_number_series(
+                df['safety_stock_qty'], field_name='safety_stock_qty'
             )
         
-        if 'safety_gap' in df.columns:
-            display_df['Safety Gap'] = df['safety_gap'].apply(
-                lambda x: _format_safety_gap(x, formatter)
-            )
+        if 'safety_gap' in cols_present:
+            cols['Safety Gap'] = _format_safety_gap_series(df['safety_gap'], formatter)
         
-        if 'available_supply' in df.columns:
-            display_df['Available'] = df['available_supply'].apply(
-                lambda x: formatter.format_number(x, field_name='available_supply')
+        if 'available_supply' in cols_present:
+            cols['Available'] = formatter.format_number_series(
+                df['available_supply'], field_name='available_supply'
             )
     
     # GAP Analysis
-    if 'net_gap' in df.columns:
-        display_df['Net GAP'] = df['net_gap'].apply(
-            lambda x: formatter.format_number(x, show_sign=True)
+    if 'net_gap' in cols_present:
+        cols['Net GAP'] = formatter.format_number_series(
+            df['net_gap'], show_sign=True
         )
     
-    if 'true_gap' in df.columns:
-        display_df['True GAP'] = df['true_gap'].apply(
-            lambda x: formatter.format_number(x, show_sign=True)
+    if 'true_gap' in cols_present:
+        cols['True GAP'] = formatter.format_number_series(
+            df['true_gap'], show_sign=True
         )
-    elif 'total_supply' in df.columns and 'total_demand' in df.columns:
-        true_gap = df['total_supply'] - df['total_demand']
-        display_df['True GAP'] = true_gap.apply(
-            lambda x: formatter.format_number(x, show_sign=True)
+    elif 'total_supply' in cols_present and 'total_demand' in cols_present:
+        true_gap = np.subtract(
+            _float_array(df['total_supply']), _float_array(df['total_demand'])
         )
+        cols['True GAP'] = formatter.format_number_array(true_gap, show_sign=True)
     
     # Shortage Cause
-    if 'shortage_cause' in df.columns:
-        display_df['Shortage Cause'] = df['shortage_cause']
+    if 'shortage_cause' in cols_present:
+        cols['Shortage Cause'] = df['shortage_cause'].values
     
     # Coverage metrics
-    if 'coverage_ratio' in df.columns:
-        display_df['Coverage %'] = df['coverage_ratio'].apply(formatter.format_coverage)
+    if 'coverage_ratio' in cols_present:
+        cols['Coverage %'] = formatter.format_coverage_series(df['coverage_ratio'])
     
-    if 'gap_percentage' in df.columns:
-        display_df['GAP %'] = df['gap_percentage'].apply(
-            lambda x: formatter.format_percentage(x, show_sign=True)
+    if 'gap_percentage' in cols_present:
+        cols['GAP %'] = formatter.format_percentage_series(
+            df['gap_percentage'], show_sign=True
         )
     
     # Additional Safety columns
     if include_safety:
-        if 'reorder_point' in df.columns:
-            display_df['Reorder Point'] = df['reorder_point'].apply(
-                lambda x: formatter.format_number(x, field_name='reorder_point')
+        if 'reorder_point' in cols_present:
+            cols['Reorder Point'] = formatter.format_number_series(
+                df['reorder_point'], field_name='reorder_point'
             )
         
-        if 'below_reorder' in df.columns:
-            display_df['Below Reorder'] = df['below_reorder'].apply(
-                lambda x: '⚠️ Yes' if x else '✅ No'
-            )
+        if 'below_reorder' in cols_present:
+            cols['Below Reorder'] = np.where(
+                df['below_reorder'].to_numpy(dtype=bool), '⚠️ Yes', '✅ No'
+            ).astype(object)
         
-        if 'safety_coverage' in df.columns:
-            display_df['Safety Coverage'] = df['safety_coverage'].apply(
-                lambda x: f"{x:.1f}x" if pd.notna(x) and x < 999 else "N/A"
-            )
+        if 'safety_coverage' in cols_present:
+            sc = _float_array(df['safety_coverage'])
+            ok = ~np.isnan(sc) & (sc < 999)
+            safety_cov = np.full(sc.shape, "N/A", dtype=object)
+            safety_cov[ok] = [f"{x:.1f}x" for x in sc[ok].tolist()]
+            cols['Safety Coverage'] = safety_cov
     
     # Financial columns
-    if 'avg_unit_cost_usd' in df.columns:
-        display_df['Unit Cost'] = df['avg_unit_cost_usd'].apply(
-            lambda x: formatter.format_currency(x, decimals=2)
+    if 'avg_unit_cost_usd' in cols_present:
+        cols['Unit Cost'] = formatter.format_currency_series(
+            df['avg_unit_cost_usd'], decimals=2
         )
     
-    if 'avg_selling_price_usd' in df.columns:
-        display_df['Sell Price'] = df['avg_selling_price_usd'].apply(
-            lambda x: formatter.format_currency(x, decimals=2)
+    if 'avg_selling_price_usd' in cols_present:
+        cols['Sell Price'] = formatter.format_currency_series(
+            df['avg_selling_price_usd'], decimals=2
         )
     
-    if 'at_risk_value_usd' in df.columns:
-        display_df['At Risk Value'] = df['at_risk_value_usd'].apply(
-            lambda x: formatter.format_currency(x, abbreviate=True)
+    if 'at_risk_value_usd' in cols_present:
+        cols['At Risk Value'] = formatter.format_currency_series(
+            df['at_risk_value_usd'], abbreviate=True
         )
     
-    if 'gap_value_usd' in df.columns:
-        display_df['GAP Value'] = df['gap_value_usd'].apply(
-            lambda x: formatter.format_currency(x, abbreviate=True)
+    if 'gap_value_usd' in cols_present:
+        cols['GAP Value'] = formatter.format_currency_series(
+            df['gap_value_usd'], abbreviate=True
         )
     
     # Status columns - v4.5 with new icons
-    if 'gap_status' in df.columns:
-        display_df['Status'] = df['gap_status'].apply(_get_status_display)
+    if 'gap_status' in cols_present:
+        cols['Status'] = _map_low_cardinality_categorical(
+            df['gap_status'], _get_status_display, missing='❓ Unknown'
+        )
     
-    if 'priority' in df.columns:
-        priority_map = {1: 'P1-Critical', 2: 'P2-High', 3: 'P3-Medium', 4: 'P4-Low', 99: 'P99-OK'}
-        display_df['Priority'] = df['priority'].map(priority_map).fillna('Unknown')
+    if 'priority' in cols_present:
+        cols['Priority'] = _map_low_cardinality(
+            df['priority'], lambda p: _PRIORITY_MAP.get(p, 'Unknown'), missing='Unknown'
+        )
     
-    if 'suggested_action' in df.columns:
-        display_df['Action'] = df['suggested_action']
+    if 'suggested_action' in cols_present:
+        cols['Action'] = df['suggested_action'].values
     
     # Customer impact
-    if 'customer_count' in df.columns:
-        display_df['Customers'] = df['customer_count'].apply(
-            lambda x: f"{int(x):,}" if pd.notna(x) and x > 0 else "-"
-        )
+    if 'customer_count' in cols_present:
+        cc = _float_array(df['customer_count'])
+        has_customers = cc > 0
+        customers = np.full(cc.shape, "-", dtype=object)
+        customers[has_customers] = [
+            f"{x:,}" for x in cc[has_customers].astype(np.int64).tolist()
+        ]
+        cols['Customers'] = customers
     
     # Expired inventory columns
     if include_expired:
-        if 'expired_quantity' in df.columns:
-            display_df['⚠️ Expired Qty'] = df['expired_quantity'].apply(
-                lambda x: formatter.format_number(x) if x > 0 else '-'
-            )
+        if 'expired_quantity' in cols_present:
+            eq = _float_array(df['expired_quantity'])
+            has_expired = eq > 0
+            expired_qty = np.full(eq.shape, '-', dtype=object)
+            expired_qty[has_expired] = formatter.format_number_series(eq[has_expired]).to_numpy()
+            cols['⚠️ Expired Qty'] = expired_qty
         
-        if 'expired_batches_info' in df.columns:
-            display_df['📋 Expired Batches'] = df['expired_batches_info'].apply(
-                lambda x: x if x else '-'
-            )
+        if 'expired_batches_info' in cols_present:
+            batches = df['expired_batches_info']
+            cols['📋 Expired Batches'] = batches.where(batches.astype(bool), '-')
     
-    return display_df
+    # Text columns as Arrow-backed strings so st.dataframe skips object inference
+    for name, col in cols.items():
+        if getattr(col, 'dtype', None) == object:
+            cols[name] = pd.array(col, dtype=STRING_DTYPE)
+    
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _prepare_detailed_display_cached(
+    df: pd.DataFrame,
+    _formatter: GAPFormatter,
+    include_safety: bool = False,
+    include_expired: bool = False
+) -> pd.DataFrame:
+    """
+    Cached prepare_detailed_display for reruns that redraw the same page
+    Formatter is stateless, so it is excluded from the cache key
+    """
+    return prepare_detailed_display(df, _formatter, include_safety, include_expired)
 
 
 # =============================================================================
@@ -556,26 +697,29 @@ def render_data_table(
         st.info("No data matches current filters")
         return None
     
-    display_df = prepare_detailed_display(
-        df, 
+    # Pagination - only the visible page gets formatted
+    total_items = len(df)
+    total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
+    page = min(current_page, total_pages)
+    
+    start_idx = (page - 1) * items_per_page
+    end_idx = min(start_idx + items_per_page, total_items)
+    
+    display_df = _prepare_detailed_display_cached(
+        df.iloc[start_idx:end_idx], 
         formatter, 
         include_safety=include_safety,
         include_expired=include_expired
     )
     
     # Default visible columns
-    default_visible = [
-        'PT Code', 'Product Name', 'Brand',
-        'Total Supply', 'Total Demand', 
-        'Net GAP', 'Coverage %',
-        'Status', 'Priority'
-    ]
+    default_visible = _DEFAULT_VISIBLE_COLUMNS
     
     # Add safety-related columns if enabled
     if include_safety:
+        default_visible = list(default_visible)
         idx = default_visible.index('Total Demand') + 1
-        safety_cols = ['Safety Stock', 'Safety Gap', 'Available', 'True GAP', 'Shortage Cause']
-        for i, col in enumerate(safety_cols):
+        for i, col in enumerate(_SAFETY_VISIBLE_COLUMNS):
             if col in display_df.columns:
                 default_visible.insert(idx + i, col)
     
@@ -617,25 +761,10 @@ def render_data_table(
             width='medium'
         )
     
-    help_texts = {
-        'Coverage %': 'Available Supply as percentage of Demand',
-        'Available': 'Supply after safety reservation = max(0, Supply - Safety)',
-        'Safety Stock': 'Minimum buffer required',
-        'At Risk Value': 'Revenue at risk due to shortage'
-    }
-    
-    for col, help_text in help_texts.items():
+    for col, help_text in _COLUMN_HELP_TEXTS.items():
         if col in display_df.columns:
             column_config[col] = st.column_config.Column(col, help=help_text)
     
-    # Pagination
-    total_items = len(display_df)
-    total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
-    page = min(current_page, total_pages)
-    
-    start_idx = (page - 1) * items_per_page
-    end_idx = min(start_idx + items_per_page, total_items)
-    
     # Display info
     col1, col2, col3 = st.columns([2, 2, 2])
     with col1:
@@ -647,7 +776,7 @@ def render_data_table(
     
     # Display table
     st.dataframe(
-        display_df.iloc[start_idx:end_idx],
+        display_df,
         use_container_width=True,
         hide_index=True,
         column_config=column_config,
@@ -712,25 +841,25 @@ def render_status_summary(gap_df: pd.DataFrame):
     if gap_df.empty:
         return
     
-    counts = {}
-    for category, config in GAP_CATEGORIES.items():
-        mask = gap_df['gap_status'].isin(config['statuses'])
-        count = len(gap_df[mask])
-        if count > 0:
-            counts[category] = {
-                'count': count,
-                'pct': (count / len(gap_df)) * 100,
-                'icon': config['icon'],
-                'label': config['label']
-            }
-    
-    cols = st.columns(len(counts))
-    for idx, (category, data) in enumerate(counts.items()):
+    # One pass: map each status to its category and count, in category order
+    category_counts = (
+        gap_df['gap_status'].map(STATUS_TO_CATEGORY)
+        .value_counts(sort=False)
+        .reindex(list(GAP_CATEGORIES), fill_value=0)
+    )
+    category_counts = category_counts[category_counts > 0]
+    category_pcts = category_counts / len(gap_df) * 100
+    
+    cols = st.columns(len(category_counts))
+    for idx, (category, count, pct) in enumerate(
+        zip(category_counts.index, category_counts.to_numpy(), category_pcts.to_numpy())
+    ):
+        config = GAP_CATEGORIES[category]
         with cols[idx]:
             st.metric(
-                f"{data['icon']} {data['label']}",
-                f"{data['count']:,}",
-                f"{data['pct']:.1f}%"
+                f"{config['icon']} {config['label']}",
+                f"{count:,}",
+                f"{pct:.1f}%"
             )
 
 
@@ -739,19 +868,10 @@ def render_status_summary(gap_df: pd.DataFrame):
 # =============================================================================
 def render_quick_filter():
     """Render quick filter for results - v4.5"""
-    filter_options = {
-        'all': '📊 All Items',
-        'shortage': '🔴 Shortage Only',
-        'optimal': '✅ Balanced Only',
-        'surplus': '📦 Surplus Only',
-        'inactive': '⚪ No Demand',
-        'critical': '🚨 Critical Only'
-    }
-    
     selected = st.radio(
         "Quick Filter",
-        options=list(filter_options.keys()),
-        format_func=lambda x: filter_options[x],
+        options=list(_FILTER_OPTIONS.keys()),
+        format_func=_FILTER_OPTIONS.__getitem__,
         horizontal=True,
         label_visibility="collapsed",
         key="quick_filter",
@@ -770,17 +890,9 @@ def apply_quick_filter(df: pd.DataFrame, filter_type: str) -> pd.DataFrame:
     if filter_type == 'critical':
         return df[df['priority'] == 1]
     
-    category_map = {
-        'shortage': 'SHORTAGE',
-        'optimal': 'OPTIMAL',
-        'surplus': 'SURPLUS',
-        'inactive': 'INACTIVE'
-    }
-    
-    category = category_map.get(filter_type)
-    if category and category in GAP_CATEGORIES:
-        statuses = GAP_CATEGORIES[category]['statuses']
-        return df[df['gap_status'].isin(statuses)]
+    category = _CATEGORY_MAP.get(filter_type)
+    if category and category in GAP_CATEGORY_STATUS_SETS:
+        return df[df['gap_status'].isin(GAP_CATEGORY_STATUS_SETS[category])]
     
     return df
 
@@ -794,22 +906,34 @@ def render_expired_inventory_summary(gap_df: pd.DataFrame):
     if gap_df.empty or 'expired_quantity' not in gap_df.columns:
         return
     
-    total_expired = gap_df['expired_quantity'].sum()
+    # One mask pass decides everything; nothing else runs when nothing expired
+    expired = gap_df['expired_quantity'].to_numpy(dtype='float64', na_value=np.nan)
+    expired_idx = np.flatnonzero(expired > 0)
+    expired_items = expired_idx.size
     
-    if total_expired > 0:
-        expired_items = len(gap_df[gap_df['expired_quantity'] > 0])
-        
-        st.warning(
-            f"⚠️ **Expired Inventory Alert**: {expired_items} products "
-            f"with total {total_expired:,.0f} units expired"
-        )
-        
-        top_expired = gap_df[gap_df['expired_quantity'] > 0].nlargest(5, 'expired_quantity')
-        
-        if not top_expired.empty:
-            with st.expander("📋 Top 5 Expired Products", expanded=False):
-                for _, row in top_expired.iterrows():
-                    st.markdown(
-                        f"**{row.get('pt_code', 'N/A')}** - {row.get('product_name', 'N/A')}: "
-                        f"{row['expired_quantity']:,.0f} units"
-                    )
\ No newline at end of file
+    if expired_items == 0:
+        return
+    
+    positive = expired[expired_idx]
+    total_expired = positive.sum()
+    
+    st.warning(
+        f"⚠️ **Expired Inventory Alert**: {expired_items} products "
+        f"with total {total_expired:,.0f} units expired"
+    )
+    
+    # Top 5 by expired quantity without sorting the whole column
+    k = min(5, expired_items)
+    top = np.sort(expired_idx[np.argpartition(-positive, k - 1)[:k]])
+    top = top[np.argsort(-expired[top], kind='stable')]
+    
+    top_expired = gap_df.iloc[top].reindex(
+        columns=['pt_code', 'product_name', 'expired_quantity'], fill_value='N/A'
+    )
+    
+    with st.expander("📋 Top 5 Expired Products", expanded=False):
+        for pt_code, product_name, qty in top_expired.itertuples(index=False, name=None):
+            st.markdown(
+                f"**{pt_code}** - {product_name}: "
+                f"{qty:,.0f} units"
+            )
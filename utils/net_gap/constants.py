@@ -49,6 +49,22 @@ GAP_CATEGORIES = {
     }
 }
 
+# Reverse lookup: gap_status -> category key
+STATUS_TO_CATEGORY = {
+    status: category
+    for category, config in GAP_CATEGORIES.items()
+    for status in config['statuses']
+}
+
+# Status membership per category, built once for isin() filtering
+GAP_CATEGORY_STATUS_SETS = {
+    category: frozenset(config['statuses'])
+    for category, config in GAP_CATEGORIES.items()
+}
+
+# Demand urgency levels, most urgent first
+URGENCY_LEVELS = ('OVERDUE', 'URGENT', 'UPCOMING', 'FUTURE')
+
 # =============================================================================
 # THRESHOLDS - Updated for Option A logic
 # =============================================================================
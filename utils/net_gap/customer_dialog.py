@@ -6,24 +6,58 @@ Simplified Customer Impact Dialog
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from typing import Optional
 import logging
 from datetime import datetime
 import io
+from itertools import groupby
+
+import xlsxwriter
 
 from .state import get_state
-from .formatters import GAPFormatter
+from .constants import URGENCY_LEVELS
+from .formatters import GAPFormatter, STRING_DTYPE
 from .components import render_pagination
 
 logger = logging.getLogger(__name__)
 
+# GAPFormatter holds no state, so one instance serves every rerun
+_FORMATTER = GAPFormatter()
+
+# Customer export columns and their sheet headers
+_EXPORT_COLUMNS = {
+    'customer': 'Customer',
+    'customer_code': 'Code',
+    'product_count': 'Products',
+    'total_required': 'Required Qty',
+    'total_shortage': 'Shortage Qty',
+    'total_demand_value': 'Demand Value',
+    'at_risk_value': 'At Risk Value',
+    'urgency': 'Urgency'
+}
+
+# Rows per sheet before the customer export is split across sheets
+_EXPORT_SHEET_ROWS = 50_000
+
+_URGENCY_ICONS = {
+    'OVERDUE': '🔴',
+    'URGENT': '🟠',
+    'UPCOMING': '🟡',
+    'FUTURE': '🟢'
+}
+
+# Icon and label per urgency category code; the trailing entry serves code -1 (missing)
+_URGENCY_ICON_BY_CODE = np.array([_URGENCY_ICONS[u] for u in URGENCY_LEVELS] + ['⚪'], dtype=object)
+_URGENCY_LABEL_BY_CODE = np.array(list(URGENCY_LEVELS) + ['N/A'], dtype=object)
+
 
 @st.dialog("Customer Impact Analysis", width="large")
 def show_customer_dialog():
     """Display customer impact analysis in dialog"""
     
     state = get_state()
-    formatter = GAPFormatter()
+    formatter = _FORMATTER
     
     # Get result from state
     result = state.get_result()
@@ -48,6 +82,15 @@ def show_customer_dialog():
             st.rerun()
         return
     
+    _dialog_body(result, customer_data, formatter, state)
+
+
+def _dialog_body(result, customer_data: pd.DataFrame, formatter: GAPFormatter, state):
+    """
+    Dialog content from the header metrics down to the Close button
+    st.dialog already runs as a fragment, so search and pagination rerun only the dialog
+    """
+    
     # Header metrics
     st.markdown("### 👥 Customer Impact Summary")
     
@@ -67,8 +110,20 @@ def show_customer_dialog():
         ))
     
     with col4:
-        # Export button
-        excel_data = export_customer_data(customer_data, formatter)
+        # Export is built only on request and kept for this result's later reruns
+        export = st.session_state.get('dialog_export')
+        if export is None or export[0] != result.timestamp:
+            export = None
+            if st.button("📥 Prepare Export", use_container_width=True, key="dlg_prepare_export"):
+                workbook = export_customer_data(customer_data, formatter)
+                if workbook is None:
+                    # Nothing is stored, so the button stays available for a retry
+                    st.error("Export failed")
+                else:
+                    export = (result.timestamp, workbook)
+                    st.session_state['dialog_export'] = export
+        
+        excel_data = export[1] if export else None
         if excel_data:
             st.download_button(
                 "📥 Export",
@@ -83,21 +138,27 @@ def show_customer_dialog():
     # Search and filter
     search = st.text_input("Search customers", placeholder="Name or code...", key="cust_search")
     
-    # Filter data
-    if search:
-        filtered = customer_data[
-            customer_data['customer'].str.contains(search, case=False, na=False) |
-            customer_data['customer_code'].astype(str).str.contains(search, case=False, na=False)
-        ]
-    else:
-        filtered = customer_data
+    # Filter data - matching row positions are kept until the search or result changes
+    view = _prep_customer_view(customer_data)
+    search_key = (search, result.timestamp, len(view))
+    if st.session_state.get('dialog_search_key') != search_key:
+        if search:
+            query = search.lower()
+            mask = view['_cust_lc'].str.contains(query, regex=False).to_numpy(dtype=bool)
+            mask |= view['_code_lc'].str.contains(query, regex=False).to_numpy(dtype=bool)
+            match_idx = np.flatnonzero(mask)
+        else:
+            match_idx = np.arange(len(view))
+        st.session_state['dialog_match_idx'] = match_idx
+        st.session_state['dialog_search_key'] = search_key
+    match_idx = st.session_state['dialog_match_idx']
     
-    if filtered.empty:
+    if match_idx.size == 0:
         st.info("No customers match search")
     else:
         # Display customers
-        st.caption(f"Showing {len(filtered)} customers")
-        display_customer_list(filtered, formatter, state)
+        st.caption(f"Showing {match_idx.size} customers")
+        display_customer_list(view, match_idx, formatter, state, view_key=search_key)
     
     st.divider()
     
@@ -106,130 +167,173 @@ def show_customer_dialog():
         # Clear the dialog flag before rerun
         if 'show_customer_dialog' in st.session_state:
             del st.session_state['show_customer_dialog']
-        st.rerun()
+        st.rerun(scope="app")
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _prep_customer_view(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Customer table with search keys and display strings added
+    Built once per customer table so keystrokes and page clicks only filter and slice
+    """
+    if 'urgency' in df.columns:
+        urgency_codes = pd.Categorical(df['urgency'], categories=URGENCY_LEVELS, ordered=True).codes
+    else:
+        urgency_codes = np.full(len(df), -1, dtype=np.int8)
+    
+    view = df.copy()
+    view['_cust_lc'] = df['customer'].fillna('').astype(str).str.lower().astype(STRING_DTYPE)
+    view['_code_lc'] = df['customer_code'].astype(STRING_DTYPE).fillna('').str.lower()
+    view['_icon'] = _URGENCY_ICON_BY_CODE[urgency_codes]
+    view['_required_fmt'] = GAPFormatter.format_number_series(df['total_required']).to_numpy()
+    view['_shortage_fmt'] = GAPFormatter.format_number_series(df['total_shortage']).to_numpy()
+    view['_at_risk_fmt'] = GAPFormatter.format_currency_series(df['at_risk_value']).to_numpy()
+    view['_urgency_fmt'] = _URGENCY_LABEL_BY_CODE[urgency_codes]
+    return view
 
 
-def display_customer_list(df: pd.DataFrame, formatter: GAPFormatter, state):
-    """Display paginated customer list"""
+def display_customer_list(
+    df: pd.DataFrame,
+    match_idx: np.ndarray,
+    formatter: GAPFormatter,
+    state,
+    view_key: Optional[tuple] = None
+):
+    """
+    Display paginated customer list from the _prep_customer_view frame
+    match_idx holds the positions of rows matching the current search;
+    view_key identifies that search so an unchanged page can be reused
+    """
     
     # Pagination settings
     items_per_page = 10
     current_page = state.get_dialog_page()
-    total_pages = max(1, (len(df) + items_per_page - 1) // items_per_page)
+    total_pages = max(1, (match_idx.size + items_per_page - 1) // items_per_page)
     
     # Ensure valid page
     page = min(current_page, total_pages)
     
-    # Get page data
-    start = (page - 1) * items_per_page
-    end = min(start + items_per_page, len(df))
-    page_data = df.iloc[start:end]
-    
-    # Urgency indicators
-    urgency_icons = {
-        'OVERDUE': '🔴',
-        'URGENT': '🟠',
-        'UPCOMING': '🟡',
-        'FUTURE': '🟢'
-    }
-    
-    # Display each customer
-    for _, row in page_data.iterrows():
-        icon = urgency_icons.get(row.get('urgency', ''), '⚪')
+    # Reruns from unrelated widgets (export) reuse the built page
+    page_key = (view_key, page)
+    cached_page = st.session_state.get('dialog_page_view')
+    if view_key is not None and cached_page is not None and cached_page[0] == page_key:
+        summary_df = cached_page[1]
+    else:
+        # Get page data - only the page's rows are taken from the view
+        start = (page - 1) * items_per_page
+        page_data = df.take(match_idx[start:start + items_per_page])
         
-        with st.expander(
-            f"{icon} **{row['customer']}** ({row['customer_code']}) - "
-            f"{row['product_count']} products affected",
-            expanded=False
-        ):
-            # Metrics
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Required", formatter.format_number(row['total_required']))
-            with col2:
-                st.metric("Shortage", formatter.format_number(row['total_shortage']))
-            with col3:
-                st.metric("At Risk", formatter.format_currency(row['at_risk_value']))
-            with col4:
-                st.metric("Urgency", row.get('urgency', 'N/A'))
-            
-            # Product details (if available)
-            if 'products' in row and row['products']:
-                st.divider()
-                st.caption("**Affected Products:**")
-                
-                products = row['products'][:10]  # Show max 10
-                
-                for i, prod in enumerate(products, 1):
-                    cols = st.columns([0.5, 3, 1.5, 1.5, 1.5])
-                    
-                    with cols[0]:
-                        st.text(str(i))
-                    with cols[1]:
-                        st.text(f"{prod.get('pt_code', '')} - {prod.get('product_name', '')[:30]}")
-                    with cols[2]:
-                        st.text(f"Qty: {prod.get('shortage_quantity', 0):.0f}")
-                    with cols[3]:
-                        st.text(formatter.format_currency(prod.get('at_risk_value', 0), abbreviate=True))
-                    with cols[4]:
-                        coverage = prod.get('coverage', 0)
-                        color = "🔴" if coverage < 50 else "🟡" if coverage < 80 else "🟢"
-                        st.text(f"{color} {coverage:.0f}%")
-                
-                if len(row['products']) > 10:
-                    st.caption(f"... and {len(row['products']) - 10} more products")
+        # One table for the whole page from the preformatted view columns
+        summary_df = pd.DataFrame({
+            ' ': page_data['_icon'].to_numpy(),
+            'Customer': page_data['customer'].to_numpy(),
+            'Code': page_data['customer_code'].to_numpy(),
+            'Products': page_data['product_count'].to_numpy(),
+            'Required': page_data['_required_fmt'].to_numpy(),
+            'Shortage': page_data['_shortage_fmt'].to_numpy(),
+            'At Risk': page_data['_at_risk_fmt'].to_numpy(),
+            'Urgency': page_data['_urgency_fmt'].to_numpy()
+        })
+        st.session_state['dialog_page_view'] = (page_key, summary_df)
+    
+    st.dataframe(
+        summary_df,
+        column_config={
+            ' ': st.column_config.TextColumn(' ', width='small'),
+            'Customer': st.column_config.TextColumn('Customer', width='large'),
+            'Products': st.column_config.NumberColumn('Products', format='%d', width='small')
+        },
+        use_container_width=True,
+        hide_index=True,
+        height=35 * len(summary_df) + 38,
+        key=f"dlg_customer_table_{page}"
+    )
     
     # Pagination
     if total_pages > 1:
         new_page = render_pagination(page, total_pages, key_prefix="dlg")
         if new_page != page:
             state.set_dialog_page(new_page, total_pages)
-            st.rerun()
+            st.rerun(scope="fragment")
 
 
 def export_customer_data(df: pd.DataFrame, formatter: GAPFormatter) -> Optional[bytes]:
     """Export customer data to Excel"""
     
     try:
-        output = io.BytesIO()
-        
-        # Prepare export data
-        export_df = df[[
-            'customer', 'customer_code', 'product_count',
-            'total_required', 'total_shortage',
-            'total_demand_value', 'at_risk_value',
-            'urgency'
-        ]].copy()
+        return _build_customer_xlsx(df)
         
-        # Format columns
-        export_df.columns = [
-            'Customer', 'Code', 'Products',
-            'Required Qty', 'Shortage Qty',
-            'Demand Value', 'At Risk Value',
-            'Urgency'
-        ]
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        return None
+
+
+@st.cache_data(show_spinner=False, ttl=600, max_entries=8)
+def _build_customer_xlsx(df: pd.DataFrame) -> bytes:
+    """
+    Build the customer export workbook
+    Cached on the dataframe content so dialog reruns reuse the same bytes
+    """
+    output = io.BytesIO()
+    
+    # Prepare export data - headers are written directly, the selection is not renamed
+    export_df = df[list(_EXPORT_COLUMNS)]
+    headers = list(_EXPORT_COLUMNS.values())
+    
+    # Stream rows straight to the sheet; constant_memory flushes each row as it is written
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'strings_to_numbers': False})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    
+    # Auto-adjust columns from the data rather than the written cells,
+    # one set_column call per run of equal widths
+    width_runs = []
+    first_col = 0
+    for width, run in groupby(_column_widths(export_df, headers)):
+        last_col = first_col + len(list(run)) - 1
+        width_runs.append((first_col, last_col, width))
+        first_col = last_col + 1
+    
+    # Missing values become blank cells, as to_excel writes them
+    rows = export_df.astype(object).where(export_df.notna(), None)
+    
+    # Large exports are split across sheets of _EXPORT_SHEET_ROWS rows each
+    n_sheets = max(1, -(-len(rows) // _EXPORT_SHEET_ROWS))
+    for sheet_idx in range(n_sheets):
+        sheet_name = 'Customer Impact' if n_sheets == 1 else f'Customer Impact {sheet_idx + 1}'
+        worksheet = workbook.add_worksheet(sheet_name)
         
-        # Write to Excel
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            export_df.to_excel(writer, sheet_name='Customer Impact', index=False)
-            
-            # Auto-adjust columns
-            worksheet = writer.sheets['Customer Impact']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                worksheet.column_dimensions[column_letter].width = min(max_length + 2, 40)
+        for first_col, last_col, width in width_runs:
+            worksheet.set_column(first_col, last_col, width)
         
-        output.seek(0)
-        return output.getvalue()
+        worksheet.write_row(0, 0, headers, header_format)
         
-    except Exception as e:
-        logger.error(f"Export failed: {e}")
-        return None
\ No newline at end of file
+        start = sheet_idx * _EXPORT_SHEET_ROWS
+        chunk = rows.iloc[start:start + _EXPORT_SHEET_ROWS]
+        for row_num, row in enumerate(chunk.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_num, 0, row)
+    
+    workbook.close()
+    
+    output.seek(0)
+    return output.getvalue()
+
+
+def _column_widths(df: pd.DataFrame, headers: Optional[list] = None, max_width: int = 40) -> list:
+    """
+    Excel column widths sized to the longest header or value in each column
+    Empty, zero and missing values are ignored, as they write blank or short cells
+    """
+    widths = []
+    for name, header in zip(df.columns, headers or df.columns):
+        col = df[name]
+        if pd.api.types.is_integer_dtype(col.dtype) and not pd.api.types.is_bool_dtype(col.dtype):
+            # Longest integer text is at one of the extremes, no string conversion needed
+            values = col.dropna().to_numpy(dtype='int64')
+            values = values[values != 0]
+            max_length = max(len(str(values.max())), len(str(values.min()))) if values.size else 0
+        else:
+            col = col.dropna()
+            col = col[col.astype(bool).to_numpy(dtype=bool)]
+            max_length = int(col.astype(str).str.len().max()) if len(col) else 0
+        widths.append(min(max(max_length, len(str(header))) + 2, max_width))
+    return widths
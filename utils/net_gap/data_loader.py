@@ -10,12 +10,18 @@ CHANGES FROM 4.5:
 """
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 import streamlit as st
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
 from typing import Optional, List, Dict, Any, Tuple
 import logging
 import re
-from sqlalchemy import text, create_engine
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import time
+import functools
+import inspect
+from sqlalchemy import text, bindparam, create_engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
@@ -28,7 +34,7 @@ from pathlib import Path
 project_root = os.environ.get('PROJECT_ROOT', Path(__file__).parent.parent.parent)
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
-from utils.db import get_db_engine
+from utils.db import get_db_engine, get_connection_pool_status
 
 logger = logging.getLogger(__name__)
 
@@ -39,12 +45,106 @@ CACHE_TTL = {
     'safety': 900      # 15 minutes for safety stock
 }
 
+# Stale-while-revalidate window: a cached load older than its TTL is still
+# served for this long while a single background refresh replaces it
+CACHE_STALE_TTL = {
+    'data': 600,
+    'safety': 1800
+}
+
+# Safety stock numeric columns -> pd.to_numeric downcast target (None keeps float64)
+SAFETY_NUMERIC_DOWNCAST = {
+    'safety_stock_qty': None,
+    'reorder_point': None,
+    'avg_daily_demand': None,
+    'safety_days': 'integer',
+    'lead_time_days': 'integer',
+    'service_level_percent': 'float',
+    'demand_std_deviation': 'float',
+    'priority_level': 'integer'
+}
+
+# Supply/demand numeric columns -> downcast target (None keeps the coerced
+# int64/float64); ids, quantities and USD values feed GAP math and merges
+SUPPLY_NUMERIC_DOWNCAST = {
+    'product_id': None,
+    'available_quantity': None,
+    'days_to_available': 'integer',
+    'days_to_expiry': 'integer',
+    'unit_cost_usd': None,
+    'total_value_usd': None,
+    'completion_percentage': 'float'
+}
+
+DEMAND_NUMERIC_DOWNCAST = {
+    'product_id': None,
+    'demand_priority': 'integer',
+    'required_quantity': None,
+    'days_to_required': 'integer',
+    'selling_unit_price': None,
+    'total_value_usd': None,
+    'aging_days': 'integer',
+    'uom_conversion': None,
+    'total_delivered_standard_quantity': None,
+    'original_standard_quantity': None
+}
+
+# Text fields that _normalize_text_field upper-cases
+_UPPER_FIELDS = frozenset({'pt_code', 'brand', 'product_name', 'standard_uom'})
+
+# Low-cardinality labels stored as category after processing; brand, UOM and
+# urgency stay strings because the calculator fills/maps them after merges
+SUPPLY_CATEGORY_COLS = ['supply_source', 'availability_status', 'warehouse_name', 'entity_name']
+DEMAND_CATEGORY_COLS = ['demand_source', 'demand_status', 'entity_name']
+
 # Validation constants
 MAX_ENTITY_NAME_LENGTH = 200
 MAX_PRODUCT_IDS = 1000
 MAX_BRANDS = 100
 BATCH_SIZE = 500  # For batch processing large datasets
 
+# Arrow-backed columns for the text-only product reference read
+READ_SQL_DTYPE_BACKEND = 'pyarrow'
+
+# WHERE fragments shared by the view query builders, keyed by the exclude flag
+_ENTITY_CLAUSE = {
+    False: "AND entity_name = :entity_name",
+    True: "AND entity_name != :entity_name"
+}
+_PRODUCT_CLAUSE = {
+    False: "AND product_id IN :product_ids",
+    True: "AND product_id NOT IN :product_ids"
+}
+_BRAND_CLAUSE = {
+    False: "AND brand IN :brands",
+    True: "AND brand NOT IN :brands"
+}
+
+# Empty result schemas, built once; callers get shallow copies
+_EMPTY_SUPPLY_DF = pd.DataFrame(columns=[
+    'supply_source', 'product_id', 'product_name', 'brand', 'pt_code',
+    'package_size', 'standard_uom', 'batch_number', 'expiry_date',
+    'days_to_expiry', 'available_quantity', 'availability_date',
+    'days_to_available', 'availability_status', 'warehouse_name',
+    'to_location', 'entity_name', 'unit_cost_usd', 'total_value_usd',
+    'supply_reference_id', 'supplier_name', 'completion_percentage'
+])
+
+_EMPTY_DEMAND_DF = pd.DataFrame(columns=[
+    'demand_source', 'demand_priority', 'product_id', 'product_name',
+    'brand', 'pt_code', 'package_size', 'standard_uom', 'customer',
+    'customer_code', 'customer_po_number', 'required_quantity',
+    'required_date', 'days_to_required', 'demand_status', 'urgency_level',
+    'selling_unit_price', 'total_value_usd', 'demand_reference_id',
+    'source_line_id', 'source_document_number', 'source_document_date',
+    'entity_name', 'aging_days', 'selling_uom', 'uom_conversion',
+    'total_delivered_standard_quantity', 'original_standard_quantity'
+])
+
+# Streaming configuration for the large view reads
+READ_CHUNK_SIZE = 50000     # Rows per DataFrame chunk from read_sql
+STREAM_ROW_BUFFER = 10000   # Rows buffered client-side by the server-side cursor
+
 
 class DataLoadError(Exception):
     """Base exception for data loading errors"""
@@ -61,24 +161,216 @@ class DatabaseConnectionError(DataLoadError):
     pass
 
 
+# ==================== STALE-WHILE-REVALIDATE CACHE ====================
+
+# key -> (value, fresh_until, stale_until), shared by all sessions
+_swr_store: Dict[Tuple, Tuple[Any, float, float]] = {}
+_swr_locks: Dict[Tuple, threading.Lock] = {}
+_swr_guard = threading.Lock()
+
+
+def _swr_lock(key: Tuple) -> threading.Lock:
+    """Get the per-key lock that serializes loads of one cache entry"""
+    with _swr_guard:
+        lock = _swr_locks.get(key)
+        if lock is None:
+            lock = _swr_locks[key] = threading.Lock()
+        return lock
+
+
+def _swr_prune(now: float) -> None:
+    """Drop entries that are past their stale window; caller holds _swr_guard"""
+    for old_key in [k for k, entry in _swr_store.items() if entry[2] <= now]:
+        del _swr_store[old_key]
+
+
+def _swr_set(key: Tuple, value: Any, fresh_ttl: float, stale_ttl: float) -> None:
+    """Store a value and drop entries that are past their stale window"""
+    now = time.monotonic()
+    with _swr_guard:
+        _swr_prune(now)
+        _swr_store[key] = (value, now + fresh_ttl, now + stale_ttl)
+
+
+def _swr_refresh(key: Tuple, loader, fresh_ttl: float, stale_ttl: float,
+                 lock: threading.Lock) -> None:
+    """Background refresh; the stale value stays in place if the load fails"""
+    try:
+        _swr_set(key, loader(), fresh_ttl, stale_ttl)
+        logger.debug(f"Background refresh done for {key[0]}")
+    except Exception as e:
+        logger.error(f"Background refresh failed for {key[0]}: {e}", exc_info=True)
+    finally:
+        lock.release()
+
+
+def get_or_set_swr(key: Tuple, loader, fresh_ttl: float = 300, stale_ttl: float = 600) -> Any:
+    """
+    Cache-aside lookup with stale-while-revalidate
+    - fresh hit: return the cached value
+    - stale hit: return the cached value and refresh it in one background thread
+    - miss or expired: load synchronously, one loader per key at a time
+    Expired entries are pruned on every read so large frames are not kept
+    until the next store
+    """
+    now = time.monotonic()
+    with _swr_guard:
+        _swr_prune(now)
+        entry = _swr_store.get(key)
+    
+    if entry is not None:
+        value, fresh_until, stale_until = entry
+        if now < fresh_until:
+            return value
+        if now < stale_until:
+            lock = _swr_lock(key)
+            # Only the first stale reader starts a refresh
+            if lock.acquire(blocking=False):
+                threading.Thread(
+                    target=_swr_refresh,
+                    args=(key, loader, fresh_ttl, stale_ttl, lock),
+                    daemon=True
+                ).start()
+            return value
+    
+    with _swr_lock(key):
+        # Another session may have finished the load while we waited
+        entry = _swr_store.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+        value = loader()
+        _swr_set(key, value, fresh_ttl, stale_ttl)
+        return value
+
+
+def clear_swr_cache() -> None:
+    """Drop all stale-while-revalidate entries"""
+    with _swr_guard:
+        _swr_store.clear()
+
+
+def swr_cache(ttl: float, stale_ttl: float):
+    """
+    Decorator form of get_or_set_swr for loader methods
+    Like st.cache_data, the leading _self argument is not part of the key
+    DataFrames are copied on the way out so callers cannot mutate the cache
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(_self, *args, **kwargs):
+            bound = signature.bind(_self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__qualname__,) + tuple(bound.arguments.values())[1:]
+            value = get_or_set_swr(
+                key, functools.partial(func, _self, *args, **kwargs), ttl, stale_ttl
+            )
+            return value.copy() if isinstance(value, pd.DataFrame) else value
+        
+        return wrapper
+    return decorator
+
+
+# ==================== COMPILED QUERY CACHE ====================
+
+@functools.lru_cache(maxsize=64)
+def _compile_text(query: str, list_params: Tuple[str, ...]):
+    """
+    Build a text() clause once per SQL template
+    With expanding list parameters the template depends only on the filter
+    shape, so only a handful of clauses are ever built
+    """
+    statement = text(query)
+    if list_params:
+        statement = statement.bindparams(
+            *(bindparam(name, expanding=True) for name in list_params)
+        )
+    return statement
+
+
+# ==================== DEFAULT DATE RANGE ====================
+
+# Fallback window around today when the views have no dates
+_DATE_OFFSET_MIN = timedelta(days=30)
+_DATE_OFFSET_MAX = timedelta(days=90)
+
+@functools.lru_cache(maxsize=1)
+def _default_date_range(today: date) -> Dict[str, date]:
+    """Fallback date range, built once per calendar day"""
+    return {
+        'min_date': today - _DATE_OFFSET_MIN,
+        'max_date': today + _DATE_OFFSET_MAX,
+        'current_date': today
+    }
+
+
+# ==================== ENTITY ID CACHE ====================
+
+# (engine, entity_name) -> (ID, expires_at), same lifetime as the reference
+# data caches; only resolved names are stored, so a company added or
+# restored later is found on the next lookup
+_entity_id_cache: Dict[Tuple[Any, str], Tuple[int, float]] = {}
+
+def _get_entity_id_cached(engine, entity_name: str) -> Optional[int]:
+    """
+    Process-wide entity name -> ID lookup
+    Keyed on the engine as well, so a swapped engine never serves old IDs
+    """
+    key = (engine, entity_name)
+    now = time.monotonic()
+    entry = _entity_id_cache.get(key)
+    if entry is not None and now < entry[1]:
+        return entry[0]
+    
+    query = """
+        SELECT id 
+        FROM companies 
+        WHERE english_name = :entity_name
+          AND delete_flag = 0
+        LIMIT 1
+    """
+    
+    with engine.connect() as conn:
+        result = conn.execute(text(query), {'entity_name': entity_name}).fetchone()
+    
+    if result:
+        entity_id = int(result[0])
+        # Sweep expired entries so the dict only holds live mappings
+        for old_key in [k for k, e in _entity_id_cache.items() if e[1] <= now]:
+            _entity_id_cache.pop(old_key, None)
+        _entity_id_cache[key] = (entity_id, now + CACHE_TTL['reference'])
+        logger.info(f"Entity ID mapping: '{entity_name}' -> {entity_id}")
+        return entity_id
+    
+    logger.warning(f"Entity not found: {entity_name}")
+    return None
+
+
+def reset_caches() -> None:
+    """Clear the process-wide entity ID and loader caches"""
+    _entity_id_cache.clear()
+    clear_swr_cache()
+
+
 class GAPDataLoader:
     """Production-ready data loader with all fixes applied"""
     
     def __init__(self):
         self._engine = None
         self._safety_stock_available = None
-        self._entity_id_cache = {}
     
     @property
     def engine(self):
-        """Lazy load database engine"""
+        """
+        Lazy load the shared pooled engine
+        The pool is configured in utils.db with pool_pre_ping, so stale
+        connections are replaced at checkout without a test query here
+        """
         if self._engine is None:
             try:
                 self._engine = get_db_engine()
-                # Test connection
-                with self._engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                logger.info("Database connection established")
+                logger.info("Database engine ready")
             except Exception as e:
                 logger.error(f"Failed to establish database connection: {e}", exc_info=True)
                 raise DatabaseConnectionError(f"Cannot connect to database: {str(e)}")
@@ -90,6 +382,8 @@ class GAPDataLoader:
         conn = None
         try:
             conn = self.engine.connect()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Pool status after checkout: {get_connection_pool_status()}")
             yield conn
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}", exc_info=True)
@@ -101,19 +395,92 @@ class GAPDataLoader:
                 except:
                     pass
     
+    @staticmethod
+    def _text_with_lists(query: str, params: Dict[str, Any]):
+        """
+        Build a text() clause whose list parameters expand at execute time
+        Any params value that is a list or tuple binds to an `IN :name` placeholder
+        """
+        list_params = tuple(sorted(
+            name for name, value in params.items() if isinstance(value, (list, tuple))
+        ))
+        return _compile_text(query, list_params)
+    
+    def _read_sql_chunked(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        process=None
+    ) -> pd.DataFrame:
+        """
+        Read a large query through a server-side cursor in chunks
+        Each chunk is processed before the next is fetched so the full
+        raw result is never held alongside its processed copy
+        """
+        with self.get_connection() as conn:
+            conn = conn.execution_options(
+                stream_results=True, max_row_buffer=STREAM_ROW_BUFFER
+            )
+            chunks = []
+            params = params or {}
+            for chunk in pd.read_sql(self._text_with_lists(query, params), conn,
+                                     params=params, chunksize=READ_CHUNK_SIZE):
+                if chunk.empty:
+                    continue
+                chunks.append(process(chunk) if process else chunk)
+        
+        if not chunks:
+            return pd.DataFrame()
+        if len(chunks) == 1:
+            return chunks[0]
+        
+        df = pd.concat(chunks, ignore_index=True)
+        # Chunks with differing categories concatenate as plain objects;
+        # merge their categories and codes instead of re-hashing the strings
+        for col in chunks[0].select_dtypes('category').columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            try:
+                df[col] = union_categoricals([chunk[col] for chunk in chunks])
+            except TypeError:
+                # An all-null chunk infers object categories
+                df[col] = df[col].astype('category')
+        return df
+    
     def _normalize_text_field(self, value: Any, field_name: str = '') -> str:
-        """Normalize text field for consistency"""
-        if pd.isna(value) or value is None:
+        """
+        Normalize text field for consistency
+        Product, brand and safety stock queries apply the same rules in SQL
+        (COALESCE/UPPER/TRIM); this is for values that did not come from them
+        """
+        # value != value catches NaN/NaT without a pd.isna dispatch
+        if value is None or value is pd.NA or value != value:
             return ''
         
         str_value = str(value).strip()
-        
-        if field_name == 'pt_code':
-            return str_value.upper()
-        elif field_name in ['brand', 'product_name', 'standard_uom']:
-            return str_value.upper()
-        else:
-            return str_value
+        return str_value.upper() if field_name in _UPPER_FIELDS else str_value
+    
+    def _normalize_text_columns(self, df: pd.DataFrame, text_cols: List[str]) -> pd.DataFrame:
+        """
+        Vectorized _normalize_text_field over whole columns
+        Missing values become '' and the same fields are upper-cased
+        """
+        for col in text_cols:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            normalized = values.astype(str).str.strip()
+            if col in _UPPER_FIELDS:
+                normalized = normalized.str.upper()
+            df[col] = normalized.mask(values.isna(), '')
+        return df
+    
+    def _to_category(self, df: pd.DataFrame, category_cols: List[str]) -> pd.DataFrame:
+        """Store repeated label columns as category codes"""
+        for col in category_cols:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
     
     # ==================== VALIDATION METHODS ====================
     
@@ -170,39 +537,20 @@ class GAPDataLoader:
     
     # ==================== ENTITY METHODS ====================
     
-    @st.cache_data(ttl=CACHE_TTL['reference'])
-    def get_entity_id(_self, entity_name: str) -> Optional[int]:
-        """Map entity name to entity ID"""
-        _self._validate_entity_name(entity_name)
-        
-        if entity_name in _self._entity_id_cache:
-            return _self._entity_id_cache[entity_name]
+    def get_entity_id(self, entity_name: str) -> Optional[int]:
+        """Map entity name to entity ID (shared across sessions)"""
+        self._validate_entity_name(entity_name)
         
         try:
-            query = """
-                SELECT id 
-                FROM companies 
-                WHERE english_name = :entity_name
-                  AND delete_flag = 0
-                LIMIT 1
-            """
-            
-            with _self.get_connection() as conn:
-                result = conn.execute(text(query), {'entity_name': entity_name}).fetchone()
-                
-                if result:
-                    entity_id = int(result[0])
-                    _self._entity_id_cache[entity_name] = entity_id
-                    logger.info(f"Entity ID mapping: '{entity_name}' -> {entity_id}")
-                    return entity_id
-                else:
-                    logger.warning(f"Entity not found: {entity_name}")
-                    return None
-                    
+            return _get_entity_id_cached(self.engine, entity_name)
         except SQLAlchemyError as e:
             logger.error(f"Error mapping entity name to ID: {e}", exc_info=True)
             raise DataLoadError(f"Failed to get entity ID: {str(e)}")
     
+    def reset_caches(self) -> None:
+        """Clear the process-wide entity ID and loader caches"""
+        reset_caches()
+    
     @st.cache_data(ttl=CACHE_TTL['reference'])
     def get_entities_formatted(_self) -> pd.DataFrame:
         """
@@ -217,17 +565,20 @@ class GAPDataLoader:
                 FROM companies c
                 WHERE c.delete_flag = 0
                   AND c.english_name IN (
-                    SELECT DISTINCT entity_name FROM unified_supply_view
+                    SELECT entity_name FROM unified_supply_view
                     WHERE entity_name IS NOT NULL
                     UNION
-                    SELECT DISTINCT entity_name FROM unified_demand_view
+                    SELECT entity_name FROM unified_demand_view
                     WHERE entity_name IS NOT NULL
                   )
                 ORDER BY c.english_name
             """
             
+            # Small result: build the frame from row mappings, skipping read_sql setup
             with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn)
+                rows = conn.execute(text(query)).mappings().all()
+            
+            df = pd.DataFrame.from_records(rows, columns=['english_name', 'company_code'])
             
             logger.info(f"Loaded {len(df)} formatted entities")
             return df
@@ -241,22 +592,18 @@ class GAPDataLoader:
     def get_entities(_self) -> List[str]:
         """Get simple list of entity names that have data"""
         try:
+            # UNION already de-duplicates across both views
             query = """
-                SELECT DISTINCT entity_name
-                FROM (
-                    SELECT DISTINCT entity_name FROM unified_supply_view
-                    WHERE entity_name IS NOT NULL
-                    UNION
-                    SELECT DISTINCT entity_name FROM unified_demand_view
-                    WHERE entity_name IS NOT NULL
-                ) AS entities
+                SELECT entity_name FROM unified_supply_view
+                WHERE entity_name IS NOT NULL
+                UNION
+                SELECT entity_name FROM unified_demand_view
+                WHERE entity_name IS NOT NULL
                 ORDER BY entity_name
             """
             
             with _self.get_connection() as conn:
-                result = conn.execute(text(query)).fetchall()
-            
-            return [row[0] for row in result if row[0]]
+                return [v for v in conn.execute(text(query)).scalars().all() if v]
             
         except Exception as e:
             logger.error(f"Error loading entities: {e}", exc_info=True)
@@ -277,37 +624,34 @@ class GAPDataLoader:
             entity_filter = ""
             
             if entity_name:
-                entity_filter = "WHERE entity_name = :entity_name"
+                entity_filter = "AND entity_name = :entity_name"
                 params['entity_name'] = entity_name
             
             # Get products from UNION of supply and demand views (like stable version)
+            # Text fields are normalized server-side (same rules as _normalize_text_field)
+            # and the UNION de-duplicates the normalized rows, so no DISTINCT is needed
+            columns = """
+                    product_id,
+                    COALESCE(UPPER(TRIM(product_name)), '') AS product_name,
+                    COALESCE(UPPER(TRIM(pt_code)), '') AS pt_code,
+                    COALESCE(TRIM(package_size), '') AS package_size,
+                    COALESCE(UPPER(TRIM(brand)), '') AS brand,
+                    COALESCE(UPPER(TRIM(standard_uom)), '') AS standard_uom
+            """
             query = f"""
-                SELECT DISTINCT 
-                    product_id, product_name, pt_code, package_size,
-                    brand, standard_uom
-                FROM (
-                    SELECT product_id, product_name, pt_code, package_size, 
-                           brand, standard_uom, entity_name
-                    FROM unified_supply_view
-                    WHERE product_id IS NOT NULL
-                    UNION
-                    SELECT product_id, product_name, pt_code, package_size, 
-                           brand, standard_uom, entity_name
-                    FROM unified_demand_view
-                    WHERE product_id IS NOT NULL
-                ) AS products
-                {entity_filter}
+                SELECT {columns}
+                FROM unified_supply_view
+                WHERE product_id IS NOT NULL {entity_filter}
+                UNION
+                SELECT {columns}
+                FROM unified_demand_view
+                WHERE product_id IS NOT NULL {entity_filter}
                 ORDER BY pt_code, product_name
             """
             
             with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
-            
-            # Normalize text fields
-            text_cols = ['product_name', 'pt_code', 'package_size', 'brand', 'standard_uom']
-            for col in text_cols:
-                if col in df.columns:
-                    df[col] = df[col].apply(lambda x: _self._normalize_text_field(x, col))
+                df = pd.read_sql(text(query), conn, params=params,
+                                 dtype_backend=READ_SQL_DTYPE_BACKEND)
             
             logger.info(f"Loaded {len(df)} products")
             return df
@@ -333,33 +677,28 @@ class GAPDataLoader:
             entity_filter = ""
             
             if entity_name:
-                entity_filter = "WHERE entity_name = :entity_name"
+                entity_filter = "AND entity_name = :entity_name"
                 params['entity_name'] = entity_name
             
             # Get brands from UNION of supply and demand views (like stable version)
             query = f"""
-                SELECT DISTINCT brand
-                FROM (
-                    SELECT DISTINCT brand, entity_name FROM unified_supply_view 
-                    WHERE brand IS NOT NULL
-                    UNION
-                    SELECT DISTINCT brand, entity_name FROM unified_demand_view 
-                    WHERE brand IS NOT NULL
-                ) AS brands
-                {entity_filter}
+                SELECT UPPER(TRIM(brand)) AS brand FROM unified_supply_view 
+                WHERE brand IS NOT NULL {entity_filter}
+                UNION
+                SELECT UPPER(TRIM(brand)) AS brand FROM unified_demand_view 
+                WHERE brand IS NOT NULL {entity_filter}
                 ORDER BY brand
             """
             
             with _self.get_connection() as conn:
-                result = conn.execute(text(query), params)
-                brands = []
-                for row in result:
-                    if row[0]:
-                        normalized = _self._normalize_text_field(row[0], 'brand')
-                        if normalized and normalized not in brands:
-                            brands.append(normalized)
+                result = conn.execute(text(query), params).scalars()
+                # SQL already returns distinct upper-cased brands; the set only
+                # catches values TRIM leaves different from Python's strip
+                brands = sorted({
+                    normalized for brand in result
+                    if brand and (normalized := _self._normalize_text_field(brand, 'brand'))
+                })
             
-            brands.sort()
             logger.info(f"Loaded {len(brands)} brands")
             return brands
             
@@ -371,29 +710,29 @@ class GAPDataLoader:
     
     # ==================== SAFETY STOCK METHODS ====================
     
-    @st.cache_data(ttl=CACHE_TTL['reference'])
+    @st.cache_data(ttl=CACHE_TTL['safety'])
     def check_safety_stock_availability(_self) -> bool:
-        """Check if safety stock data is available"""
+        """Check if safety stock data is available (stops at the first active row)"""
         if _self._safety_stock_available is not None:
             return _self._safety_stock_available
         
         try:
             query = """
-                SELECT COUNT(*) as count
+                SELECT 1
                 FROM safety_stock_levels
                 WHERE delete_flag = 0
                   AND is_active = 1
                   AND CURRENT_DATE() >= effective_from
                   AND (effective_to IS NULL OR CURRENT_DATE() <= effective_to)
+                LIMIT 1
             """
             
             with _self.get_connection() as conn:
                 result = conn.execute(text(query)).fetchone()
                 
-                count = result[0] if result else 0
-                _self._safety_stock_available = count > 0
+                _self._safety_stock_available = result is not None
                 
-                logger.info(f"Safety stock availability: {_self._safety_stock_available} ({count} active records)")
+                logger.info(f"Safety stock availability: {_self._safety_stock_available}")
                 return _self._safety_stock_available
                 
         except SQLAlchemyError as e:
@@ -401,7 +740,51 @@ class GAPDataLoader:
             _self._safety_stock_available = False
             return False
     
-    @st.cache_data(ttl=CACHE_TTL['safety'])
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def _safety_stock_query(
+        filter_entity: bool,
+        exclude_entity: bool,
+        filter_products: bool
+    ) -> str:
+        """Build the safety stock SQL for one filter shape (cached)"""
+        # Use COALESCE for potentially missing columns
+        query_parts = ["""
+            SELECT 
+                product_id,
+                COALESCE(UPPER(TRIM(product_name)), '') as product_name,
+                COALESCE(UPPER(TRIM(pt_code)), '') as pt_code,
+                COALESCE(UPPER(TRIM(brand)), '') as brand,
+                COALESCE(TRIM(entity_name), '') as entity_name,
+                customer_name,
+                COALESCE(safety_stock_qty, 0) as safety_stock_qty,
+                COALESCE(reorder_point, 0) as reorder_point,
+                calculation_method,
+                -- Safely handle potentially missing calculation parameters
+                COALESCE(avg_daily_demand, 0) as avg_daily_demand,
+                COALESCE(safety_days, 0) as safety_days,
+                COALESCE(lead_time_days, 0) as lead_time_days,
+                COALESCE(service_level_percent, 95) as service_level_percent,
+                COALESCE(demand_std_deviation, 0) as demand_std_deviation,
+                COALESCE(priority_level, 99) as priority_level,
+                rule_type
+            FROM safety_stock_current_view
+            WHERE 1=1
+        """]
+        
+        # Add entity filter
+        if filter_entity:
+            query_parts.append(_ENTITY_CLAUSE[exclude_entity])
+        
+        # Add product filter
+        if filter_products:
+            query_parts.append(_PRODUCT_CLAUSE[False])
+        
+        query_parts.append("ORDER BY priority_level, product_id")
+        
+        return '\n'.join(query_parts)
+    
+    @swr_cache(ttl=CACHE_TTL['safety'], stale_ttl=CACHE_STALE_TTL['safety'])
     def load_safety_stock_data(
         _self,
         entity_name: Optional[str] = None,
@@ -416,77 +799,20 @@ class GAPDataLoader:
             _self._validate_entity_name(entity_name)
             _self._validate_product_ids(product_ids)
             
-            # Use COALESCE for potentially missing columns
-            query_parts = ["""
-                SELECT 
-                    product_id,
-                    product_name,
-                    pt_code,
-                    brand,
-                    entity_name,
-                    customer_name,
-                    COALESCE(safety_stock_qty, 0) as safety_stock_qty,
-                    COALESCE(reorder_point, 0) as reorder_point,
-                    calculation_method,
-                    -- Safely handle potentially missing calculation parameters
-                    COALESCE(avg_daily_demand, 0) as avg_daily_demand,
-                    COALESCE(safety_days, 0) as safety_days,
-                    COALESCE(lead_time_days, 0) as lead_time_days,
-                    COALESCE(service_level_percent, 95) as service_level_percent,
-                    COALESCE(demand_std_deviation, 0) as demand_std_deviation,
-                    COALESCE(priority_level, 99) as priority_level,
-                    rule_type
-                FROM safety_stock_current_view
-                WHERE 1=1
-            """]
-            
-            params = {}
-            
-            # Add entity filter
-            if entity_name:
-                if exclude_entity:
-                    query_parts.append("AND entity_name != :entity_name")
-                else:
-                    query_parts.append("AND entity_name = :entity_name")
-                params['entity_name'] = entity_name
-            
-            # Add product filter
-            if product_ids:
-                product_list = list(product_ids)
-                placeholders = [f":prod_{i}" for i in range(len(product_list))]
-                query_parts.append(f"AND product_id IN ({','.join(placeholders)})")
-                
-                for i, pid in enumerate(product_list):
-                    params[f'prod_{i}'] = pid
-            
-            query_parts.append("ORDER BY priority_level, product_id")
+            query = _self._safety_stock_query(
+                bool(entity_name), exclude_entity, bool(product_ids)
+            )
             
-            query = '\n'.join(query_parts)
+            params = _self._filter_params(entity_name, product_ids)
             
-            with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
+            df = _self._read_sql_chunked(
+                query, params, process=_self._process_safety_stock_dataframe
+            )
             
             if df.empty:
                 logger.warning("No safety stock data found for given filters")
                 return pd.DataFrame()
             
-            # Process dataframe - ensure numeric columns
-            numeric_cols = [
-                'safety_stock_qty', 'reorder_point', 'avg_daily_demand',
-                'safety_days', 'lead_time_days', 'service_level_percent',
-                'demand_std_deviation', 'priority_level'
-            ]
-            
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            
-            # Normalize text fields
-            text_cols = ['pt_code', 'product_name', 'brand', 'entity_name']
-            for col in text_cols:
-                if col in df.columns:
-                    df[col] = df[col].apply(lambda x: _self._normalize_text_field(x, col))
-            
             logger.info(f"Loaded {len(df)} safety stock records")
             return df
             
@@ -499,7 +825,7 @@ class GAPDataLoader:
     
     # ==================== SUPPLY DATA METHODS ====================
     
-    @st.cache_data(ttl=CACHE_TTL['data'])
+    @swr_cache(ttl=CACHE_TTL['data'], stale_ttl=CACHE_STALE_TTL['data'])
     def load_supply_data(
         _self,
         entity_name: Optional[str] = None,
@@ -508,29 +834,35 @@ class GAPDataLoader:
         brands: Optional[Tuple[str, ...]] = None,
         exclude_products: bool = False,
         exclude_brands: bool = False,
-        exclude_expired: bool = True
+        exclude_expired: bool = True,
+        order_by: bool = True
     ) -> pd.DataFrame:
-        """Load supply data from unified_supply_view"""
+        """
+        Load supply data from unified_supply_view
+        Pass order_by=False when the caller aggregates or sorts the rows itself
+        """
         try:
             _self._validate_entity_name(entity_name)
             _self._validate_product_ids(product_ids)
             _self._validate_list_input(brands, "brands", MAX_BRANDS)
             
-            query, params = _self._build_supply_query(
-                entity_name, exclude_entity, product_ids, brands,
-                exclude_products, exclude_brands, exclude_expired
+            query = _self._build_supply_query(
+                bool(entity_name), exclude_entity,
+                bool(product_ids), exclude_products,
+                bool(brands), exclude_brands,
+                exclude_expired, order_by
             )
+            params = _self._filter_params(entity_name, product_ids, brands)
             
-            with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
+            df = _self._read_sql_chunked(
+                query, params, process=_self._process_supply_dataframe
+            )
             
             if df.empty:
                 logger.warning("No supply data found for given filters")
                 # Return empty DataFrame with proper schema to prevent KeyError
                 return _self._get_empty_supply_dataframe()
             
-            df = _self._process_supply_dataframe(df)
-            
             logger.info(
                 f"Loaded {len(df)} supply records | "
                 f"Entity: {entity_name or 'All'} | "
@@ -548,7 +880,7 @@ class GAPDataLoader:
     
     # ==================== DEMAND DATA METHODS ====================
     
-    @st.cache_data(ttl=CACHE_TTL['data'])
+    @swr_cache(ttl=CACHE_TTL['data'], stale_ttl=CACHE_STALE_TTL['data'])
     def load_demand_data(
         _self,
         entity_name: Optional[str] = None,
@@ -556,29 +888,35 @@ class GAPDataLoader:
         product_ids: Optional[Tuple[int, ...]] = None,
         brands: Optional[Tuple[str, ...]] = None,
         exclude_products: bool = False,
-        exclude_brands: bool = False
+        exclude_brands: bool = False,
+        order_by: bool = True
     ) -> pd.DataFrame:
-        """Load demand data from unified_demand_view"""
+        """
+        Load demand data from unified_demand_view
+        Pass order_by=False when the caller aggregates or sorts the rows itself
+        """
         try:
             _self._validate_entity_name(entity_name)
             _self._validate_product_ids(product_ids)
             _self._validate_list_input(brands, "brands", MAX_BRANDS)
             
-            query, params = _self._build_demand_query(
-                entity_name, exclude_entity, product_ids, brands,
-                exclude_products, exclude_brands
+            query = _self._build_demand_query(
+                bool(entity_name), exclude_entity,
+                bool(product_ids), exclude_products,
+                bool(brands), exclude_brands,
+                order_by
             )
+            params = _self._filter_params(entity_name, product_ids, brands)
             
-            with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
+            df = _self._read_sql_chunked(
+                query, params, process=_self._process_demand_dataframe
+            )
             
             if df.empty:
                 logger.warning("No demand data found for given filters")
                 # Return empty DataFrame with proper schema to prevent KeyError
                 return _self._get_empty_demand_dataframe()
             
-            df = _self._process_demand_dataframe(df)
-            
             logger.info(
                 f"Loaded {len(df)} demand records | "
                 f"Entity: {entity_name or 'All'} | "
@@ -593,9 +931,87 @@ class GAPDataLoader:
             logger.error(f"Database error loading demand data: {e}", exc_info=True)
             raise DataLoadError(f"Failed to load demand data: {str(e)}")
     
+    def load_supply_and_demand(
+        self,
+        entity_name: Optional[str] = None,
+        exclude_entity: bool = False,
+        product_ids: Optional[Tuple[int, ...]] = None,
+        brands: Optional[Tuple[str, ...]] = None,
+        exclude_products: bool = False,
+        exclude_brands: bool = False,
+        exclude_expired: bool = True,
+        order_by: bool = True
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Load supply and demand concurrently, each on its own pooled connection
+        Wall time is the slower of the two queries rather than their sum;
+        errors from either load are raised as from the single-frame loaders
+        """
+        filters = dict(
+            entity_name=entity_name,
+            exclude_entity=exclude_entity,
+            product_ids=product_ids,
+            brands=brands,
+            exclude_products=exclude_products,
+            exclude_brands=exclude_brands,
+            order_by=order_by
+        )
+        
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='gap-load') as executor:
+            supply = executor.submit(
+                self.load_supply_data, exclude_expired=exclude_expired, **filters
+            )
+            demand = executor.submit(self.load_demand_data, **filters)
+            return supply.result(), demand.result()
+    
     # ==================== EXPIRED INVENTORY METHODS ====================
     
-    @st.cache_data(ttl=CACHE_TTL['data'])
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _expired_inventory_query(
+        filter_entity: bool,
+        exclude_entity: bool,
+        filter_products: bool,
+        exclude_products: bool,
+        filter_brands: bool,
+        exclude_brands: bool
+    ) -> str:
+        """Build the expired inventory SQL for one filter shape (cached)"""
+        # One row per batch; grouping per product happens in pandas
+        # Follow-up (DB side): an (expiry_date, available_quantity) index on the
+        # inventory table behind unified_supply_view would let this slice use a
+        # range scan; the view and schema are not managed in this repository
+        query_parts = ["""
+            SELECT 
+                product_id,
+                pt_code,
+                product_name,
+                brand,
+                batch_number,
+                expiry_date,
+                available_quantity,
+                warehouse_name
+            FROM unified_supply_view
+            WHERE supply_source = 'INVENTORY'
+            AND expiry_date < CURRENT_DATE()
+            AND available_quantity > 0
+        """]
+        
+        # Add filters [same as before]
+        if filter_entity:
+            query_parts.append(_ENTITY_CLAUSE[exclude_entity])
+        
+        if filter_products:
+            query_parts.append(_PRODUCT_CLAUSE[exclude_products])
+        
+        if filter_brands:
+            query_parts.append(_BRAND_CLAUSE[exclude_brands])
+        
+        query_parts.append("ORDER BY product_id, expiry_date, batch_number")
+        
+        return '\n'.join(query_parts)
+    
+    @swr_cache(ttl=CACHE_TTL['data'], stale_ttl=CACHE_STALE_TTL['data'])
     def load_expired_inventory_details(
         _self,
         entity_name: Optional[str] = None,
@@ -610,95 +1026,29 @@ class GAPDataLoader:
         FIXED: GROUP BY only product_id to avoid duplicates
         """
         try:
-            # First check if we have inventory data with expiry dates
-            check_query = """
-                SELECT COUNT(*) 
-                FROM unified_supply_view
-                WHERE supply_source = 'INVENTORY'
-                AND expiry_date IS NOT NULL
-                AND expiry_date < CURRENT_DATE()
-            """
-            
-            with _self.get_connection() as conn:
-                result = conn.execute(text(check_query)).fetchone()
-                
-                if not result or result[0] == 0:
-                    logger.info("No expired inventory found in supply view")
-                    return pd.DataFrame()
-            
-            # Build query for expired inventory from supply view
-            # FIXED: Use MIN/MAX for text fields, GROUP BY only product_id
-            query_parts = ["""
-                SELECT 
-                    product_id,
-                    MIN(pt_code) as pt_code,
-                    MIN(product_name) as product_name,
-                    MIN(brand) as brand,
-                    SUM(available_quantity) as expired_quantity,
-                    GROUP_CONCAT(
-                        CONCAT(
-                            'Batch: ', IFNULL(batch_number, 'N/A'),
-                            ' | Exp: ', DATE_FORMAT(expiry_date, '%Y-%m-%d'),
-                            ' | Qty: ', available_quantity,
-                            ' | WH: ', IFNULL(warehouse_name, 'N/A')
-                        ) SEPARATOR '; '
-                    ) as expired_batches_info
-                FROM unified_supply_view
-                WHERE supply_source = 'INVENTORY'
-                AND expiry_date < CURRENT_DATE()
-                AND available_quantity > 0
-            """]
-            
-            params = {}
-            
-            # Add filters [same as before]
-            if entity_name:
-                if exclude_entity:
-                    query_parts.append("AND entity_name != :entity_name")
-                else:
-                    query_parts.append("AND entity_name = :entity_name")
-                params['entity_name'] = entity_name
-            
-            if product_ids:
-                product_list = list(product_ids)
-                placeholders = [f":prod_{i}" for i in range(len(product_list))]
-                
-                if exclude_products:
-                    query_parts.append(f"AND product_id NOT IN ({','.join(placeholders)})")
-                else:
-                    query_parts.append(f"AND product_id IN ({','.join(placeholders)})")
-                
-                for i, pid in enumerate(product_list):
-                    params[f'prod_{i}'] = pid
-            
-            if brands:
-                brand_list = list(brands)
-                placeholders = [f":brand_{i}" for i in range(len(brand_list))]
-                
-                if exclude_brands:
-                    query_parts.append(f"AND brand NOT IN ({','.join(placeholders)})")
-                else:
-                    query_parts.append(f"AND brand IN ({','.join(placeholders)})")
-                
-                for i, brand in enumerate(brand_list):
-                    params[f'brand_{i}'] = brand
-            
-            # FIXED: GROUP BY only product_id to ensure unique rows
-            query_parts.append("GROUP BY product_id")
+            # No separate COUNT precheck: an empty result already means
+            # there is no expired inventory for these filters
+            query = _self._expired_inventory_query(
+                bool(entity_name), exclude_entity,
+                bool(product_ids), exclude_products,
+                bool(brands), exclude_brands
+            )
             
-            query = '\n'.join(query_parts)
+            params = _self._filter_params(entity_name, product_ids, brands)
             
+            # Keep DECIMAL quantities as-is so batch text shows the DB value
             with _self.get_connection() as conn:
-                df = pd.read_sql(text(query), conn, params=params)
+                batches = pd.read_sql(
+                    _self._text_with_lists(query, params), conn,
+                    params=params, coerce_float=False
+                )
             
-            if df.empty:
+            if batches.empty:
                 logger.info("No expired inventory found for given filters")
                 return pd.DataFrame()
             
-            # Format batch info
-            df['expired_batches_info'] = df['expired_batches_info'].apply(
-                lambda x: _self._format_batch_info(x) if pd.notna(x) else ""
-            )
+            # FIXED: group by product_id only to ensure unique rows
+            df = _self._aggregate_expired_batches(batches)
             
             # Debug: Check for duplicates
             if df['product_id'].duplicated().any():
@@ -714,6 +1064,32 @@ class GAPDataLoader:
             # Return empty dataframe on error to not break the main flow
             return pd.DataFrame()
     
+    def _aggregate_expired_batches(self, batches: pd.DataFrame) -> pd.DataFrame:
+        """Collapse expired batch rows to one row per product with batch summary text"""
+        expiry = pd.to_datetime(batches['expiry_date'], errors='coerce').dt.strftime('%Y-%m-%d')
+        batch_str = (
+            'Batch: ' + batches['batch_number'].fillna('N/A').astype(str)
+            + ' | Exp: ' + expiry
+            + ' | Qty: ' + batches['available_quantity'].astype(str)
+            + ' | WH: ' + batches['warehouse_name'].fillna('N/A').astype(str)
+        )
+        batches = batches.assign(
+            available_quantity=pd.to_numeric(batches['available_quantity'], errors='coerce'),
+            batch_str=batch_str
+        )
+        
+        df = batches.groupby('product_id', sort=True).agg(
+            pt_code=('pt_code', 'min'),
+            product_name=('product_name', 'min'),
+            brand=('brand', 'min'),
+            expired_quantity=('available_quantity', 'sum'),
+            expired_batches_info=('batch_str', lambda s: '; '.join(s.dropna()))
+        ).reset_index()
+        
+        # Truncate once, after joining
+        df['expired_batches_info'] = df['expired_batches_info'].map(self._format_batch_info)
+        return df
+    
     def _format_batch_info(self, batch_str: str, max_length: int = 200) -> str:
         """Format batch information string"""
         if not batch_str:
@@ -755,45 +1131,55 @@ class GAPDataLoader:
             """
             
             with _self.get_connection() as conn:
-                result = conn.execute(text(query)).fetchone()
+                row = conn.execute(text(query)).mappings().first()
             
-            if result and result[0] and result[1]:
+            if row and row['min_date'] and row['max_date']:
                 return {
-                    'min_date': result[0],
-                    'max_date': result[1],
-                    'current_date': result[2]
+                    'min_date': row['min_date'],
+                    'max_date': row['max_date'],
+                    'current_date': row['current_date']
                 }
             
             # Default values if no data
-            current = datetime.now().date()
-            return {
-                'min_date': current - timedelta(days=30),
-                'max_date': current + timedelta(days=90),
-                'current_date': current
-            }
+            return _default_date_range(date.today())
             
         except Exception as e:
             logger.error(f"Error getting date range: {e}")
-            current = datetime.now().date()
-            return {
-                'min_date': current - timedelta(days=30),
-                'max_date': current + timedelta(days=90),
-                'current_date': current
-            }
+            return _default_date_range(date.today())
     
     # ==================== QUERY BUILDERS ====================
     
-    def _build_supply_query(
-        self,
+    @staticmethod
+    def _filter_params(
         entity_name: Optional[str],
+        product_ids: Optional[Tuple[int, ...]] = None,
+        brands: Optional[Tuple[str, ...]] = None
+    ) -> Dict[str, Any]:
+        """Bind values for the entity/product/brand filters of the view queries"""
+        params = {}
+        if entity_name:
+            params['entity_name'] = entity_name
+        # One expanding parameter per list keeps the SQL text independent of its
+        # length; the filter tuples bind as-is, without a list copy
+        if product_ids:
+            params['product_ids'] = product_ids
+        if brands:
+            params['brands'] = brands
+        return params
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _build_supply_query(
+        filter_entity: bool,
         exclude_entity: bool,
-        product_ids: Optional[Tuple[int, ...]],
-        brands: Optional[Tuple[str, ...]],
+        filter_products: bool,
         exclude_products: bool,
+        filter_brands: bool,
         exclude_brands: bool,
-        exclude_expired: bool
-    ) -> Tuple[str, Dict[str, Any]]:
-        """Build supply query"""
+        exclude_expired: bool,
+        order_by: bool = True
+    ) -> str:
+        """Build the supply SQL for one filter shape (cached)"""
         
         query_parts = ["""
             SELECT 
@@ -823,57 +1209,36 @@ class GAPDataLoader:
             WHERE 1=1
         """]
         
-        params = {}
-        
         # Add filters
-        if entity_name:
-            if exclude_entity:
-                query_parts.append("AND entity_name != :entity_name")
-            else:
-                query_parts.append("AND entity_name = :entity_name")
-            params['entity_name'] = entity_name
+        if filter_entity:
+            query_parts.append(_ENTITY_CLAUSE[exclude_entity])
         
-        if product_ids:
-            product_list = list(product_ids)
-            placeholders = [f":prod_{i}" for i in range(len(product_list))]
-            
-            if exclude_products:
-                query_parts.append(f"AND product_id NOT IN ({','.join(placeholders)})")
-            else:
-                query_parts.append(f"AND product_id IN ({','.join(placeholders)})")
-            
-            for i, pid in enumerate(product_list):
-                params[f'prod_{i}'] = pid
+        if filter_products:
+            query_parts.append(_PRODUCT_CLAUSE[exclude_products])
         
-        if brands:
-            brand_list = list(brands)
-            placeholders = [f":brand_{i}" for i in range(len(brand_list))]
-            
-            if exclude_brands:
-                query_parts.append(f"AND brand NOT IN ({','.join(placeholders)})")
-            else:
-                query_parts.append(f"AND brand IN ({','.join(placeholders)})")
-            
-            for i, brand in enumerate(brand_list):
-                params[f'brand_{i}'] = brand
+        if filter_brands:
+            query_parts.append(_BRAND_CLAUSE[exclude_brands])
         
         if exclude_expired:
             query_parts.append("AND (expiry_date IS NULL OR expiry_date >= CURRENT_DATE())")
         
-        query_parts.append("ORDER BY product_id, supply_priority, days_to_available")
+        if order_by:
+            query_parts.append("ORDER BY product_id, supply_priority, days_to_available")
         
-        return '\n'.join(query_parts), params
+        return '\n'.join(query_parts)
     
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
     def _build_demand_query(
-        self,
-        entity_name: Optional[str],
+        filter_entity: bool,
         exclude_entity: bool,
-        product_ids: Optional[Tuple[int, ...]],
-        brands: Optional[Tuple[str, ...]],
+        filter_products: bool,
         exclude_products: bool,
-        exclude_brands: bool
-    ) -> Tuple[str, Dict[str, Any]]:
-        """Build demand query - Updated for simplified view (no allocation)"""
+        filter_brands: bool,
+        exclude_brands: bool,
+        order_by: bool = True
+    ) -> str:
+        """Build the demand SQL for one filter shape (cached) - simplified view, no allocation"""
         
         query_parts = ["""
             SELECT 
@@ -909,126 +1274,116 @@ class GAPDataLoader:
             WHERE 1=1
         """]
         
-        params = {}
-        
         # Add filters
-        if entity_name:
-            if exclude_entity:
-                query_parts.append("AND entity_name != :entity_name")
-            else:
-                query_parts.append("AND entity_name = :entity_name")
-            params['entity_name'] = entity_name
+        if filter_entity:
+            query_parts.append(_ENTITY_CLAUSE[exclude_entity])
         
-        if product_ids:
-            product_list = list(product_ids)
-            placeholders = [f":prod_{i}" for i in range(len(product_list))]
-            
-            if exclude_products:
-                query_parts.append(f"AND product_id NOT IN ({','.join(placeholders)})")
-            else:
-                query_parts.append(f"AND product_id IN ({','.join(placeholders)})")
-            
-            for i, pid in enumerate(product_list):
-                params[f'prod_{i}'] = pid
+        if filter_products:
+            query_parts.append(_PRODUCT_CLAUSE[exclude_products])
         
-        if brands:
-            brand_list = list(brands)
-            placeholders = [f":brand_{i}" for i in range(len(brand_list))]
-            
-            if exclude_brands:
-                query_parts.append(f"AND brand NOT IN ({','.join(placeholders)})")
-            else:
-                query_parts.append(f"AND brand IN ({','.join(placeholders)})")
-            
-            for i, brand in enumerate(brand_list):
-                params[f'brand_{i}'] = brand
+        if filter_brands:
+            query_parts.append(_BRAND_CLAUSE[exclude_brands])
         
-        query_parts.append("ORDER BY product_id, demand_priority, days_to_required")
+        if order_by:
+            query_parts.append("ORDER BY product_id, demand_priority, days_to_required")
         
-        return '\n'.join(query_parts), params
+        return '\n'.join(query_parts)
     
     # ==================== EMPTY DATAFRAME SCHEMAS ====================
     
     def _get_empty_supply_dataframe(self) -> pd.DataFrame:
         """Return empty supply DataFrame with proper schema to prevent KeyError"""
-        return pd.DataFrame(columns=[
-            'supply_source', 'product_id', 'product_name', 'brand', 'pt_code',
-            'package_size', 'standard_uom', 'batch_number', 'expiry_date',
-            'days_to_expiry', 'available_quantity', 'availability_date',
-            'days_to_available', 'availability_status', 'warehouse_name',
-            'to_location', 'entity_name', 'unit_cost_usd', 'total_value_usd',
-            'supply_reference_id', 'supplier_name', 'completion_percentage'
-        ])
+        return _EMPTY_SUPPLY_DF.copy(deep=False)
     
     def _get_empty_demand_dataframe(self) -> pd.DataFrame:
         """Return empty demand DataFrame with proper schema (simplified, no allocation)"""
-        return pd.DataFrame(columns=[
-            'demand_source', 'demand_priority', 'product_id', 'product_name',
-            'brand', 'pt_code', 'package_size', 'standard_uom', 'customer',
-            'customer_code', 'customer_po_number', 'required_quantity',
-            'required_date', 'days_to_required', 'demand_status', 'urgency_level',
-            'selling_unit_price', 'total_value_usd', 'demand_reference_id',
-            'source_line_id', 'source_document_number', 'source_document_date',
-            'entity_name', 'aging_days', 'selling_uom', 'uom_conversion',
-            'total_delivered_standard_quantity', 'original_standard_quantity'
-        ])
+        return _EMPTY_DEMAND_DF.copy(deep=False)
     
     # ==================== DATA PROCESSING METHODS ====================
     
+    def _process_safety_stock_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Process and normalize safety stock dataframe"""
+        
+        # Ensure numeric columns in one pass over the block
+        numeric_cols = [col for col in SAFETY_NUMERIC_DOWNCAST if col in df.columns]
+        numeric = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        
+        # Narrow the rule parameters; quantities used in GAP math stay float64
+        for col in numeric_cols:
+            if SAFETY_NUMERIC_DOWNCAST[col]:
+                numeric[col] = pd.to_numeric(numeric[col], downcast=SAFETY_NUMERIC_DOWNCAST[col])
+        
+        df[numeric_cols] = numeric
+        
+        # Text fields arrive normalized from the query
+        return df
+    
+    @staticmethod
+    def _coerce_numeric(values: pd.Series, downcast: Optional[str] = None) -> pd.Series:
+        """
+        Coerce to numbers with missing as 0, optionally narrowing the dtype
+        Columns the driver already returned as numbers skip the parse, and
+        integer columns (which cannot hold NaN) skip the fill as well
+        """
+        kind = values.dtype.kind
+        numeric = values if kind in 'iuf' else pd.to_numeric(values, errors='coerce')
+        if kind not in 'iu':
+            numeric = numeric.fillna(0)
+        return pd.to_numeric(numeric, downcast=downcast) if downcast else numeric
+    
+    @staticmethod
+    def _coerce_datetime(values: pd.Series) -> pd.Series:
+        """Parse dates unless the column already arrived as datetime64"""
+        if values.dtype.kind == 'M':
+            return values
+        return pd.to_datetime(values, errors='coerce')
+    
     def _process_supply_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process and normalize supply dataframe"""
         
-        # Convert date columns
+        # Date columns
         date_cols = ['availability_date', 'expiry_date', 'source_document_date']
-        for col in date_cols:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
         
-        # Ensure numeric columns
-        numeric_cols = [
-            'product_id', 'available_quantity', 'days_to_available',
-            'days_to_expiry', 'unit_cost_usd', 'total_value_usd',
-            'completion_percentage'
-        ]
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        # Convert dates and numerics in one assign rather than a write per column
+        df = df.assign(
+            **{col: self._coerce_datetime(df[col])
+               for col in date_cols if col in df.columns},
+            **{col: self._coerce_numeric(df[col], downcast)
+               for col, downcast in SUPPLY_NUMERIC_DOWNCAST.items() if col in df.columns}
+        )
         
         # Normalize text fields
-        text_cols = ['pt_code', 'product_name', 'brand', 'standard_uom', 'entity_name']
-        for col in text_cols:
-            if col in df.columns:
-                df[col] = df[col].apply(lambda x: self._normalize_text_field(x, col))
+        df = self._normalize_text_columns(
+            df, ['pt_code', 'product_name', 'brand', 'standard_uom', 'entity_name']
+        )
         
-        return df
+        df = self._to_category(df, SUPPLY_CATEGORY_COLS)
+        
+        # The column writes above leave one block per column; a single copy
+        # regroups same-dtype columns so later groupbys read contiguous blocks
+        return df.copy()
     
     def _process_demand_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process and normalize demand dataframe (simplified, no allocation)"""
         
-        # Convert date columns
+        # Date columns
         date_cols = ['required_date', 'source_document_date']
-        for col in date_cols:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
         
-        # Ensure numeric columns
-        numeric_cols = [
-            'product_id', 'demand_priority', 'required_quantity',
-            'days_to_required', 'selling_unit_price', 'total_value_usd',
-            'aging_days', 'uom_conversion',
-            'total_delivered_standard_quantity', 'original_standard_quantity'
-        ]
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        # Convert dates and numerics in one assign rather than a write per column
+        df = df.assign(
+            **{col: self._coerce_datetime(df[col])
+               for col in date_cols if col in df.columns},
+            **{col: self._coerce_numeric(df[col], downcast)
+               for col, downcast in DEMAND_NUMERIC_DOWNCAST.items() if col in df.columns}
+        )
         
         # Normalize text fields
-        text_cols = ['pt_code', 'product_name', 'brand', 'standard_uom',
-                     'customer', 'customer_code', 'entity_name']
-        for col in text_cols:
-            if col in df.columns:
-                df[col] = df[col].apply(lambda x: self._normalize_text_field(x, col))
+        df = self._normalize_text_columns(
+            df, ['pt_code', 'product_name', 'brand', 'standard_uom',
+                 'customer', 'customer_code', 'entity_name']
+        )
+        
+        df = self._to_category(df, DEMAND_CATEGORY_COLS)
         
-        return df
\ No newline at end of file
+        # Same single consolidating copy as the supply processor
+        return df.copy()
\ No newline at end of file
@@ -5,7 +5,9 @@ Formatting utilities for GAP Analysis - Fixed no-demand display
 """
 
 import pandas as pd
-from typing import Union, Optional, Any
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Union, Optional, Any
 
 # Fields that should show 0 instead of N/A
 ZERO_DEFAULT_FIELDS = [
@@ -16,9 +18,55 @@ ZERO_DEFAULT_FIELDS = [
 ]
 
 
+@lru_cache(maxsize=64)
+def _na_text_for(field_name: Optional[str]) -> str:
+    """Missing-value text for a field: supply fields show 0 instead of N/A"""
+    if field_name and any(field in field_name.lower() for field in ZERO_DEFAULT_FIELDS):
+        return "0"
+    return "N/A"
+
+
+@lru_cache(maxsize=64)
+def _number_spec(decimals: int, prefix: str = "", suffix: str = "") -> Callable[[float], str]:
+    """Bound str.format for a thousands-separated number with fixed decimals"""
+    return f"{prefix}{{:,.{decimals}f}}{suffix}".format
+
+
+@lru_cache(maxsize=64)
+def _currency_spec(currency: str, decimals: int) -> Callable[[float], str]:
+    """Bound str.format for the standard (non-abbreviated) currency display"""
+    if currency == "USD":
+        return _number_spec(decimals, prefix="$")
+    return _number_spec(decimals, suffix=f" {currency}")
+
+
+def _to_float_array(values: Union[pd.Series, np.ndarray]) -> np.ndarray:
+    """Coerce a column to a float64 ndarray (non-numeric becomes NaN)"""
+    if isinstance(values, np.ndarray) and values.dtype == np.float64:
+        return values
+    return pd.to_numeric(pd.Series(values, copy=False), errors='coerce').to_numpy(
+        dtype='float64', na_value=np.nan
+    )
+
+
+# Arrow-backed strings: Streamlit hands these to Arrow without per-cell inference
+STRING_DTYPE = 'string[pyarrow]'
+
+
+def _as_series(result: np.ndarray, values: Union[pd.Series, np.ndarray]) -> pd.Series:
+    """Wrap formatted strings, keeping the source index when there is one"""
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(pd.array(result, dtype=STRING_DTYPE), index=index)
+
+
 class GAPFormatter:
     """Handles all formatting for display and export with logical no-demand handling"""
     
+    # Currency abbreviation buckets (same cut-offs as format_currency)
+    _ABBREV_THRESH = np.array([1e3, 1e6, 1e9])
+    _ABBREV_DIV = np.array([1.0, 1e3, 1e6, 1e9])
+    _ABBREV_SUF = np.array(['', 'K', 'M', 'B'])
+    
     # formatters.py
     @staticmethod
     def format_number(
@@ -33,9 +81,7 @@ class GAPFormatter:
         """
         # Check if this is a supply field
         if pd.isna(value) or value is None:
-            if field_name and any(field in field_name.lower() for field in ZERO_DEFAULT_FIELDS):
-                return "0"
-            return "N/A"
+            return _na_text_for(field_name)
         
         try:
             # Format number with proper rounding
@@ -43,7 +89,7 @@ class GAPFormatter:
                 # ✅ Use round() instead of int() to properly round
                 formatted = f"{round(value):,}"
             else:
-                formatted = f"{value:,.{decimals}f}"
+                formatted = _number_spec(decimals)(value)
             
             # Add sign if requested
             if show_sign and value > 0:
@@ -78,10 +124,7 @@ class GAPFormatter:
                     return f"${value/1e3:.1f}K"
             
             # Standard format
-            if currency == "USD":
-                return f"${value:,.{decimals}f}"
-            else:
-                return f"{value:,.{decimals}f} {currency}"
+            return _currency_spec(currency, decimals)(value)
                 
         except (ValueError, TypeError):
             return str(value)
@@ -166,4 +209,118 @@ class GAPFormatter:
                 return f"{int(days)} days"
                 
         except (ValueError, TypeError):
-            return str(value)
\ No newline at end of file
+            return str(value)
+    
+    # -------------------------------------------------------------------------
+    # Vectorized column formatters
+    # Same output as the scalar versions above, one pass per column
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def format_number_array(
+        values: Union[pd.Series, np.ndarray],
+        decimals: int = 0,
+        show_sign: bool = False,
+        field_name: Optional[str] = None
+    ) -> np.ndarray:
+        """Vectorized format_number returning an object ndarray of strings"""
+        arr = _to_float_array(values)
+        result = np.full(arr.shape, _na_text_for(field_name), dtype=object)
+        
+        valid = ~np.isnan(arr)
+        vals = arr[valid]
+        if decimals == 0:
+            # round() semantics; adding 0.0 turns -0.0 into 0.0
+            vals = np.round(vals) + 0.0
+        
+        fmt = _number_spec(decimals)
+        formatted = [fmt(v) for v in vals.tolist()]
+        
+        if show_sign:
+            for i in np.flatnonzero(arr[valid] > 0).tolist():
+                formatted[i] = "+" + formatted[i]
+        
+        result[valid] = formatted
+        return result
+    
+    @staticmethod
+    def format_number_series(
+        values: Union[pd.Series, np.ndarray],
+        decimals: int = 0,
+        show_sign: bool = False,
+        field_name: Optional[str] = None
+    ) -> pd.Series:
+        """Vectorized format_number for a whole column"""
+        result = GAPFormatter.format_number_array(values, decimals, show_sign, field_name)
+        return _as_series(result, values)
+    
+    @staticmethod
+    def format_currency_series(
+        values: Union[pd.Series, np.ndarray],
+        currency: str = "USD",
+        decimals: int = 2,
+        abbreviate: bool = False
+    ) -> pd.Series:
+        """Vectorized format_currency for a whole column"""
+        arr = _to_float_array(values)
+        result = np.full(arr.shape, "N/A", dtype=object)
+        
+        valid = ~np.isnan(arr)
+        
+        fmt = _currency_spec(currency, decimals)
+        
+        plain = valid
+        if abbreviate:
+            # Bucket 0 = below 1K (plain format), 1..3 = K/M/B
+            abs_arr = np.abs(np.where(valid, arr, 0.0))
+            bucket = np.searchsorted(GAPFormatter._ABBREV_THRESH, abs_arr, side='right')
+            abbrev = valid & (bucket > 0)
+            plain = valid & (bucket == 0)
+            
+            scaled = arr[abbrev] / GAPFormatter._ABBREV_DIV[bucket[abbrev]]
+            suffixes = GAPFormatter._ABBREV_SUF[bucket[abbrev]]
+            result[abbrev] = [
+                f"${v:.1f}{suffix}" for v, suffix in zip(scaled.tolist(), suffixes.tolist())
+            ]
+        
+        result[plain] = [fmt(v) for v in arr[plain].tolist()]
+        return _as_series(result, values)
+    
+    @staticmethod
+    def format_percentage_series(
+        values: Union[pd.Series, np.ndarray],
+        decimals: int = 1,
+        show_sign: bool = False,
+        no_demand_text: str = "N/A"
+    ) -> pd.Series:
+        """Vectorized format_percentage for a whole column"""
+        arr = _to_float_array(values)
+        result = np.full(arr.shape, no_demand_text, dtype=object)
+        
+        valid = ~np.isnan(arr)
+        vals = arr[valid]
+        
+        fmt = f"{{:.{decimals}f}}%".format
+        formatted = [fmt(v) for v in vals.tolist()]
+        
+        if show_sign:
+            for i in np.flatnonzero(vals > 0).tolist():
+                formatted[i] = "+" + formatted[i]
+        
+        result[valid] = formatted
+        return _as_series(result, values)
+    
+    @staticmethod
+    def format_coverage_series(values: Union[pd.Series, np.ndarray]) -> pd.Series:
+        """Vectorized format_coverage for a whole column"""
+        arr = _to_float_array(values)
+        result = np.full(arr.shape, "No Demand", dtype=object)
+        
+        valid = ~np.isnan(arr)
+        over = valid & (arr > 10)
+        zero = valid & (arr <= 0)
+        normal = valid & ~over & ~zero
+        
+        result[over] = ">999%"
+        result[zero] = "0%"
+        result[normal] = [f"{v:.0f}%" for v in (arr[normal] * 100).tolist()]
+        return _as_series(result, values)
@@ -110,7 +110,11 @@ class GAPState:
         # Clear dialog states
         dialog_keys = [
             'show_customer_dialog',
-            self.KEY_DIALOG_PAGE
+            self.KEY_DIALOG_PAGE,
+            'dialog_search_key',
+            'dialog_match_idx',
+            'dialog_export',
+            'dialog_page_view'
         ]
         for key in dialog_keys:
             if key in st.session_state:
@@ -180,6 +184,10 @@ class GAPState:
             'quick_add_cancelled',
             'show_quick_add',
             'show_customer_dialog',
+            'dialog_search_key',
+            'dialog_match_idx',
+            'dialog_export',
+            'dialog_page_view',
             'quick_filter',
             'items_per_page',
             'search'
@@ -568,4 +568,6 @@ class PeriodGAPDataLoader:
     def clear_cache(self):
         """Clear data cache"""
         self._cache.clear()
-        st.cache_data.clear()
\ No newline at end of file
+        st.cache_data.clear()
+        from utils.net_gap.data_loader import reset_caches
+        reset_caches()
\ No newline at end of file